@@ -6,7 +6,10 @@ from fastapi.responses import FileResponse
 from database import create_db_and_tables
 from recommender import recommender
 from tmdb import tmdb
-from routers import auth, movies, users, profile, admin
+from prewarm import prewarmer
+from llm_service import llm_service
+from config import settings
+from routers import auth, movies, users, profile, admin, library
 
 # --- App Init ---
 app = FastAPI(title="Movie Recommender API (OTT Edition)")
@@ -25,10 +28,14 @@ app.add_middleware(
 async def on_startup():
     create_db_and_tables()
     recommender.load_data()
+    if settings.TMDB_PREWARM_ENABLED:
+        prewarmer.start()
 
 @app.on_event("shutdown")
 async def on_shutdown():
+    await prewarmer.stop()
     await tmdb.close()
+    llm_service.close()
 
 # --- Routers ---
 app.include_router(auth.router)
@@ -36,6 +43,7 @@ app.include_router(movies.router)
 app.include_router(users.router)
 app.include_router(profile.router)
 app.include_router(admin.router)
+app.include_router(library.router)
 
 # --- Static Files (Lite Version) ---
 # app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -0,0 +1,121 @@
+"""
+Model artifact storage.
+
+An artifact is a directory of raw .npy arrays plus a small meta.json.
+Loading memory-maps every array read-only, so all workers on a machine share
+one page-cache copy and startup time does not depend on model size.
+
+Each build is written to its own version directory under the model root and
+published by atomically rewriting the CURRENT pointer file:
+
+    data/model/CURRENT              -> "20260101T030000Z"
+    data/model/20260101T030000Z/    meta.json + *.npy
+"""
+import json
+import os
+import shutil
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+FORMAT_VERSION = 1
+META_FILE = "meta.json"
+CURRENT_FILE = "CURRENT"
+# Older versions are kept briefly so a rollback is just rewriting CURRENT
+KEEP_VERSIONS = 3
+
+
+def _atomic_write(path: str, write) -> None:
+    # Write next to the target and rename, so a running worker never maps a half-written file
+    tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def current_version(root: str) -> Optional[str]:
+    try:
+        with open(os.path.join(root, CURRENT_FILE), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _new_version(root: str) -> str:
+    version = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    # Two builds within the same second still get distinct directories
+    suffix = 1
+    candidate = version
+    while os.path.exists(os.path.join(root, candidate)):
+        suffix += 1
+        candidate = f"{version}-{suffix}"
+    return candidate
+
+
+def save_artifacts(root: str, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Writes a new artifact version under root (each array as <name>.npy, meta.json last),
+    then points CURRENT at it. Returns the written metadata.
+    """
+    os.makedirs(root, exist_ok=True)
+    parent = current_version(root)
+    version = _new_version(root)
+    path = os.path.join(root, version)
+    os.makedirs(path)
+
+    entries = {}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        filename = f"{name}.npy"
+        _atomic_write(os.path.join(path, filename), lambda f: np.save(f, array, allow_pickle=False))
+        entries[name] = {"file": filename, "dtype": array.dtype.str, "shape": list(array.shape)}
+
+    meta = dict(meta)
+    meta.update({
+        "format_version": FORMAT_VERSION,
+        "version": version,
+        "parent_version": parent,
+        "built_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "arrays": entries,
+    })
+    payload = json.dumps(meta, indent=2).encode("utf-8")
+    _atomic_write(os.path.join(path, META_FILE), lambda f: f.write(payload))
+
+    # Publish: new workers open this version, running ones keep their mapped files
+    _atomic_write(os.path.join(root, CURRENT_FILE), lambda f: f.write(version.encode("utf-8")))
+    _prune_versions(root, keep=KEEP_VERSIONS)
+    return meta
+
+
+def _prune_versions(root: str, keep: int) -> None:
+    versions = sorted(
+        name for name in os.listdir(root)
+        if os.path.isfile(os.path.join(root, name, META_FILE))
+    )
+    for name in versions[:-keep]:
+        # Open memory maps survive the unlink, so this is safe with workers still running
+        shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def load_artifacts(root: str, mmap_mode: Optional[str] = "r") -> Tuple[Optional[Dict[str, Any]], Dict[str, np.ndarray]]:
+    """
+    Opens the current artifact version under root. Returns (meta, arrays), or (None, {})
+    if nothing has been built yet. Arrays are memory-mapped unless mmap_mode is None.
+    """
+    version = current_version(root)
+    path = os.path.join(root, version) if version else root
+    meta_path = os.path.join(path, META_FILE)
+    if not os.path.exists(meta_path):
+        return None, {}
+
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+
+    if meta.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format {meta.get('format_version')} (expected {FORMAT_VERSION})")
+
+    arrays = {}
+    for name, entry in meta.get("arrays", {}).items():
+        arrays[name] = np.load(os.path.join(path, entry["file"]), mmap_mode=mmap_mode, allow_pickle=False)
+    return meta, arrays
@@ -0,0 +1,67 @@
+"""
+Recall / throughput benchmark for the neighbor backends.
+
+Opens the current model artifact, computes ground-truth neighbors by brute-force
+TF-IDF cosine, then reports recall@K and queries per second for the exact
+backend and for the IVF backend at several nprobe settings.
+
+Usage: python bench_neighbors.py [--queries 500] [--k 10] [--nprobe 1 4 8 16]
+"""
+import argparse
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+from artifacts import load_artifacts
+from neighbors import create_backend, top_k_indices
+
+MODEL_DIR = "data/model"
+
+
+def ground_truth(tfidf, rows, k):
+    return [set(top_k_indices((tfidf @ tfidf[row].T).toarray().ravel(), k, exclude=row).tolist()) for row in rows]
+
+
+def measure(backend, rows, k, truth):
+    start = time.perf_counter()
+    results = [backend.neighbors(row, k) for row in rows]
+    elapsed = time.perf_counter() - start
+    recall = np.mean([len(truth_set & set(result.tolist())) / max(len(truth_set), 1)
+                      for truth_set, result in zip(truth, results)])
+    return recall, len(rows) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    meta, arrays = load_artifacts(MODEL_DIR)
+    if meta is None:
+        raise SystemExit("No model artifact found, run build_models.py first.")
+    num_rows = len(arrays["movie_ids"])
+    tfidf = sp.csr_matrix((arrays["tfidf_data"], arrays["tfidf_indices"], arrays["tfidf_indptr"]),
+                          shape=(num_rows, len(arrays["tfidf_terms"])))
+    rows = np.random.default_rng(42).integers(0, num_rows, size=args.queries)
+    truth = ground_truth(tfidf, rows, args.k)
+
+    print(f"{num_rows} movies, {args.queries} queries, k={args.k}, artifact {meta['version']}")
+    print(f"{'backend':<16}{'recall@k':>10}{'QPS':>10}")
+    exact = create_backend("exact", meta, arrays, tfidf)
+    recall, qps = measure(exact, rows, args.k, truth)
+    print(f"{exact.name:<16}{recall:>10.3f}{qps:>10.0f}")
+
+    if "ivf_centroids" not in arrays:
+        print("(artifact has no IVF index, rebuild with --dims > 0 to compare)")
+        return
+    for nprobe in args.nprobe:
+        ivf = create_backend("ivf", meta, arrays, tfidf, nprobe=nprobe)
+        recall, qps = measure(ivf, rows, args.k, truth)
+        print(f"{f'ivf nprobe={nprobe}':<16}{recall:>10.3f}{qps:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,27 @@
 import pandas as pd
 import numpy as np
+import scipy.sparse as sp
+from sklearn.decomposition import TruncatedSVD
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
+from concurrent.futures import ProcessPoolExecutor
+import argparse
 import ast
-import pickle
+import json
 import os
+import time
+
+from artifacts import load_artifacts, save_artifacts
+from catalog import save_catalog
+from neighbors import top_k_rows
+from search_index import build_search_index
 
 # Paths
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, '..', 'data')
 OUTPUT_DIR = os.path.join(BASE_DIR, 'data')
+MODEL_DIR = os.path.join(OUTPUT_DIR, 'model')
+CATALOG_PATH = os.path.join(OUTPUT_DIR, 'catalog.db')
 
 # Ensure output directory exists
 os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -22,31 +34,52 @@ LANGUAGE_MAPPING = {
     'ml': 'Malayalam'
 }
 
-def build_models():
-    print("⏳ Loading data...")
+# Number of neighbors kept per movie in the sparse index
+DEFAULT_TOP_K = 50
+# Above this share of changed rows an incremental build is no cheaper than a full one
+MAX_INCREMENTAL_FRACTION = 0.25
+# Rows scored together. Peak memory per worker is about BLOCK_ROWS × N × 12 bytes: the float32
+# score block plus the int64 index array argpartition builds over it (the sparse product, up to
+# 8 bytes per nonzero, is freed once densified). 1024 rows × 100k movies is about 1.2 GB.
+BLOCK_ROWS = 1024
+# Reduced embedding size for the IVF (approximate) backend; 0 skips that stage
+EMBEDDING_DIMS = 128
+IVF_KMEANS_ITERATIONS = 10
+RANDOM_SEED = 42
+# Top-billed cast members per movie listed in the catalog's people table (directors are always listed)
+CAST_PER_MOVIE = 5
+
+def parse_items(value):
+    """'[{"id": 28, "name": "Action"}, ...]' -> list of dicts. Empty for missing values."""
+    if not isinstance(value, str) or not value.startswith('['):
+        return []
+    try:
+        return json.loads(value)
+    except ValueError:
+        # Some dumps use Python literal syntax (single quotes)
+        return ast.literal_eval(value)
+
+def parse_names(value):
+    """'[{"id": 28, "name": "Action"}, ...]' -> 'Action ...'. Empty for missing values."""
+    return ' '.join(i['name'] for i in parse_items(value))
+
+def load_catalog():
+    """Reads and merges the TMDB CSVs into the processed movies frame, or None if missing."""
     try:
         movies = pd.read_csv(os.path.join(DATA_DIR, 'tmdb_5000_movies.csv'))
         credits = pd.read_csv(os.path.join(DATA_DIR, 'tmdb_5000_credits.csv'))
     except FileNotFoundError:
         print(f"❌ Error: Data files not found in {DATA_DIR}")
-        return
+        return None
 
     # Merge
-    print("🔄 Processing data...")
     credits = credits.rename(columns={'movie_id': 'id'})
     movies = movies.merge(credits, on='id')
 
-    # Extract genres
-    movies['genres'] = movies['genres'].apply(
-        lambda x: ' '.join([i['name'] for i in ast.literal_eval(x)]) 
-        if isinstance(x, str) and x.startswith('[') else ''
-    )
-
-    # Extract countries
-    movies['production_countries'] = movies['production_countries'].apply(
-        lambda x: ' '.join([i['name'] for i in ast.literal_eval(x)]) 
-        if isinstance(x, str) and x.startswith('[') else ''
-    )
+    # Extract genres and countries ({id, name} pairs are kept for the local catalog)
+    movies['genre_list'] = movies['genres'].apply(parse_items)
+    movies['genres'] = movies['genres'].apply(parse_names)
+    movies['production_countries'] = movies['production_countries'].apply(parse_names)
 
     # Combine tags
     movies['tags'] = movies['overview'].fillna('') + ' ' + movies['genres'] + ' ' + movies['production_countries']
@@ -60,22 +93,350 @@ def build_models():
     if 'title_x' not in movies.columns and 'title' in movies.columns:
         movies['title_x'] = movies['title']
 
-    # Keep only necessary columns to save space
-    # We need title_x for searching, id for uniqueness, and maybe others for display
-    # We'll keep the whole dataframe for now as per original script, but maybe drop 'tags' after computing sim to save space?
-    # Actually, let's keep it simple.
-    
-    print("🧮 Computing Similarity Matrix (this may take a moment)...")
-    tfidf = TfidfVectorizer(stop_words='english', max_features=5000)
-    tfidf_matrix = tfidf.fit_transform(movies['tags'].values.astype('U'))
-    cosine_sim = cosine_similarity(tfidf_matrix)
+    return movies
+
+def catalog_rows(movies):
+    """Card-level fields per movie, shaped like TMDB's /movie/{id} response."""
+    def clean(value):
+        return None if pd.isna(value) else value
+
+    for movie in movies.itertuples(index=False):
+        yield {
+            'id': int(movie.id),
+            'title': clean(movie.title_x),
+            'overview': clean(movie.overview),
+            'release_date': clean(movie.release_date),
+            'vote_average': None if pd.isna(movie.vote_average) else float(movie.vote_average),
+            'genres': movie.genre_list,
+            'original_language': clean(movie.original_language),
+        }
+
+def catalog_people(movies):
+    """(name, role, movie count) for the top-billed cast and the directors in the credits."""
+    counts = {}
+    for cast, crew in zip(movies['cast'], movies['crew']):
+        for person in parse_items(cast)[:CAST_PER_MOVIE]:
+            counts[(person['name'], 'cast')] = counts.get((person['name'], 'cast'), 0) + 1
+        for person in parse_items(crew):
+            if person.get('job') == 'Director':
+                counts[(person['name'], 'director')] = counts.get((person['name'], 'director'), 0) + 1
+    people = {}
+    # Someone both cast and directing is listed once, as a director
+    for (name, role), count in sorted(counts.items(), key=lambda item: item[0][1] != 'director'):
+        if name and name not in people:
+            people[name] = (name, role, count)
+    return list(people.values())
+
+def neighbors_for_rows(tfidf_matrix, rows, k):
+    """
+    Top-k neighbors of the given rows against the whole catalog, self excluded.
+    TF-IDF rows are L2-normalized, so the sparse dot product is the cosine similarity.
+    """
+    # The matrix is float32, so this densifies straight to float32 without another copy
+    sims = (tfidf_matrix[rows] @ tfidf_matrix.T).toarray().astype(np.float32, copy=False)
+    sims[np.arange(len(rows)), rows] = -np.inf
+    return top_k_rows(sims, k)
+
+# Set in each pool worker by the initializer, so the matrix is pickled once per worker
+_worker_matrix = None
+
+def _init_worker(tfidf_matrix):
+    global _worker_matrix
+    _worker_matrix = tfidf_matrix
+
+def _neighbors_block(args):
+    rows, k = args
+    return neighbors_for_rows(_worker_matrix, rows, k)
+
+def compute_neighbors(tfidf_matrix, rows, k, block_rows=BLOCK_ROWS, workers=None):
+    """
+    Top-k neighbors for `rows`, scored block by block with sparse-sparse products.
+    Only the top-k of each block is kept, so peak memory is bounded by block_rows × N
+    per worker instead of N × N. Blocks run in parallel across a process pool.
+    Returns (indices, scores) arrays aligned with rows.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    indices = np.zeros((len(rows), k), dtype=np.int64)
+    scores = np.zeros((len(rows), k), dtype=np.float32)
+    blocks = [rows[start:start + block_rows] for start in range(0, len(rows), block_rows)]
+    workers = min(workers or os.cpu_count() or 1, len(blocks))
+
+    if workers <= 1:
+        results = (neighbors_for_rows(tfidf_matrix, block, k) for block in blocks)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(tfidf_matrix,))
+        results = pool.map(_neighbors_block, [(block, k) for block in blocks])
+
+    try:
+        offset = 0
+        for block_indices, block_scores in results:
+            indices[offset:offset + len(block_indices)] = block_indices
+            scores[offset:offset + len(block_indices)] = block_scores
+            offset += len(block_indices)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return indices, scores
+
+def to_csr(indices, scores):
+    """(N, k) neighbor matrices -> CSR arrays (indptr, int32 indices, float32 scores)."""
+    n, k = indices.shape
+    indptr = np.arange(0, n * k + 1, k, dtype=np.int64) if k else np.zeros(n + 1, dtype=np.int64)
+    return indptr, indices.astype(np.int32).ravel(), scores.astype(np.float32).ravel()
+
+def project_embeddings(tfidf_matrix, components):
+    """Projects TF-IDF rows onto SVD components, L2-normalized float32 (zero rows stay zero)."""
+    embeddings = np.asarray(tfidf_matrix @ components.T, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return embeddings / norms
+
+def build_embeddings(tfidf_matrix, dims):
+    """TruncatedSVD of the TF-IDF rows. Returns (embeddings, components)."""
+    dims = min(dims, tfidf_matrix.shape[1] - 1, tfidf_matrix.shape[0] - 1)
+    svd = TruncatedSVD(n_components=dims, random_state=RANDOM_SEED)
+    svd.fit(tfidf_matrix)
+    components = svd.components_.astype(np.float32)
+    return project_embeddings(tfidf_matrix, components), components
+
+def assign_lists(embeddings, centroids, block_rows=BLOCK_ROWS):
+    """Nearest centroid (by cosine) for every embedding, computed in row blocks."""
+    assign = np.empty(len(embeddings), dtype=np.int64)
+    for start in range(0, len(embeddings), block_rows):
+        assign[start:start + block_rows] = np.argmax(embeddings[start:start + block_rows] @ centroids.T, axis=1)
+    return assign
+
+def train_ivf(embeddings, n_lists, iterations=IVF_KMEANS_ITERATIONS):
+    """Spherical k-means centroids for the IVF coarse quantizer."""
+    rng = np.random.default_rng(RANDOM_SEED)
+    n = len(embeddings)
+    n_lists = max(1, min(n_lists, n))
+    centroids = embeddings[rng.choice(n, n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assign = assign_lists(embeddings, centroids)
+        # One-hot (lists × N) product sums each list's members in one sparse op
+        members = sp.csr_matrix((np.ones(n, dtype=np.float32), (assign, np.arange(n))), shape=(n_lists, n))
+        sums = np.asarray(members @ embeddings, dtype=np.float32)
+        norms = np.linalg.norm(sums, axis=1)
+        empty = norms == 0
+        # Re-seed lists that lost all members so every list stays useful
+        sums[empty] = embeddings[rng.choice(n, int(empty.sum()), replace=False)]
+        norms[empty] = 1
+        centroids = sums / norms[:, None]
+    return centroids
+
+def inverted_lists(assign, n_lists):
+    """Rows grouped by list as CSR arrays (indptr, int32 rows)."""
+    rows = np.argsort(assign, kind='stable').astype(np.int32)
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=n_lists))]).astype(np.int64)
+    return indptr, rows
+
+def incremental_update(movies, hashes, prev_meta, prev, top_k, block_rows=BLOCK_ROWS, workers=None):
+    """
+    Reuses the previous artifact's vocabulary, IDF, TF-IDF rows and neighbor lists.
+    Only new or changed rows are transformed. Neighbor lists are recomputed for
+    those rows and for rows that lost a neighbor. Every other row only merges in
+    the changed movies as candidates. Returns None when a full build is needed.
+    """
+    if prev_meta.get('similarity') != 'sparse' or 'row_hashes' not in prev or 'tfidf_idf' not in prev:
+        return None
+
+    n = len(movies)
+    k = min(top_k, n - 1)
+    prev_k = prev_meta.get('top_k')
+    if k != prev_k or np.any(np.diff(prev['neighbor_indptr']) != prev_k):
+        return None
+
+    # Previous row for every current row, -1 when the movie is new or its text changed
+    prev_rows = {int(mid): row for row, mid in enumerate(prev['movie_ids'])}
+    source = np.full(n, -1, dtype=np.int64)
+    for row, (mid, row_hash) in enumerate(zip(movies['id'].to_numpy(), hashes)):
+        prev_row = prev_rows.get(int(mid))
+        if prev_row is not None and prev['row_hashes'][prev_row] == row_hash:
+            source[row] = prev_row
+    changed = np.flatnonzero(source < 0)
+    unchanged = np.flatnonzero(source >= 0)
+    if len(changed) > MAX_INCREMENTAL_FRACTION * n:
+        return None
+
+    # Frozen vocabulary and IDF: old rows stay valid, new rows land in the same space
+    terms = prev['tfidf_terms']
+    tfidf = TfidfVectorizer(stop_words='english', vocabulary={str(t): i for i, t in enumerate(terms)})
+    tfidf.idf_ = np.asarray(prev['tfidf_idf'], dtype=np.float64)
+    old_matrix = sp.csr_matrix(
+        (prev['tfidf_data'], prev['tfidf_indices'], prev['tfidf_indptr']), shape=(len(prev['movie_ids']), len(terms))
+    )
+    if len(changed):
+        new_matrix = tfidf.transform(movies['tags'].iloc[changed].values.astype('U')).astype(np.float32)
+    else:
+        new_matrix = sp.csr_matrix((0, len(terms)), dtype=np.float32)
+    take = source.copy()
+    take[changed] = old_matrix.shape[0] + np.arange(len(changed))
+    tfidf_matrix = sp.vstack([old_matrix, new_matrix]).tocsr()[take]
+
+    # Old neighbor lists in current row numbers; -1 marks a neighbor that was removed or changed
+    prev_to_cur = np.full(old_matrix.shape[0], -1, dtype=np.int64)
+    prev_to_cur[source[unchanged]] = unchanged
+    old_indices = prev_to_cur[np.asarray(prev['neighbor_indices']).reshape(-1, k)[source[unchanged]]]
+    old_scores = np.asarray(prev['neighbor_scores']).reshape(-1, k)[source[unchanged]]
+
+    # A list that lost a neighbor can't know its next best candidate, so it is recomputed
+    broken = (old_indices < 0).any(axis=1)
+    recompute = np.concatenate([changed, unchanged[broken]])
+    merge_rows, old_indices, old_scores = unchanged[~broken], old_indices[~broken], old_scores[~broken]
+
+    indices = np.zeros((n, k), dtype=np.int64)
+    scores = np.zeros((n, k), dtype=np.float32)
+    if len(recompute):
+        indices[recompute], scores[recompute] = compute_neighbors(tfidf_matrix, recompute, k, block_rows, workers)
+
+    if len(merge_rows) and len(changed):
+        # Block by block like compute_neighbors: at most block_rows × len(changed) candidates at once
+        changed_t = tfidf_matrix[changed].T
+        for start in range(0, len(merge_rows), block_rows):
+            block = slice(start, start + block_rows)
+            rows = merge_rows[block]
+            candidate_scores = (tfidf_matrix[rows] @ changed_t).toarray().astype(np.float32, copy=False)
+            all_indices = np.hstack([old_indices[block], np.broadcast_to(changed, candidate_scores.shape)])
+            all_scores = np.hstack([old_scores[block], candidate_scores])
+            pick, scores[rows] = top_k_rows(all_scores, k)
+            indices[rows] = np.take_along_axis(all_indices, pick, axis=1)
+    elif len(merge_rows):
+        indices[merge_rows], scores[merge_rows] = old_indices, old_scores
+
+    print(f"   Incremental: {len(changed)} new/changed rows, {int(broken.sum())} lists recomputed, "
+          f"{len(merge_rows)} lists merged")
+    return tfidf_matrix, terms, tfidf.idf_, to_csr(indices, scores)
+
+def build_models(mode="sparse", top_k=DEFAULT_TOP_K, incremental=False, block_rows=BLOCK_ROWS, workers=None,
+                 dims=EMBEDDING_DIMS, ivf_lists=None):
+    """
+    Writes a new version of the memory-mappable model artifact to backend/data/model/.
+    mode="sparse" stores only the top_k neighbors per movie, computed in row blocks
+    (block_rows at a time, across `workers` processes) without ever building N×N,
+    mode="dense" stores the full N×N matrix as float32.
+    mode="embedding" stores no neighbor data; the API ranks by the SVD embeddings.
+    incremental=True (sparse only) updates the current artifact instead of refitting.
+    dims > 0 also builds SVD embeddings and an IVF index (ivf_lists lists, default
+    sqrt(N)) for the approximate backend.
+    """
+    started = time.time()
+    print("⏳ Loading data...")
+    movies = load_catalog()
+    if movies is None:
+        return
+
+    # Content fingerprint per row; unchanged fingerprints let incremental builds skip the row
+    hashes = pd.util.hash_pandas_object(movies['tags'], index=False).to_numpy(dtype=np.uint64)
+
+    if mode == "embedding" and dims <= 0:
+        print(f"⚠️ Embedding mode needs embeddings, using --dims {EMBEDDING_DIMS}.")
+        dims = EMBEDDING_DIMS
+
+    update = None
+    prev = {}
+    if incremental:
+        if mode != "sparse":
+            print("⚠️ Incremental builds only support sparse mode, doing a full build.")
+        else:
+            prev_meta, prev = load_artifacts(MODEL_DIR)
+            update = incremental_update(movies, hashes, prev_meta, prev, top_k, block_rows, workers) if prev_meta else None
+            if update is None:
+                print("⚠️ No compatible previous artifact (or too many changes), doing a full build.")
+
+    if update is not None:
+        tfidf_matrix, terms, idf, neighbors = update
+    else:
+        tfidf = TfidfVectorizer(stop_words='english', max_features=5000)
+        tfidf_matrix = tfidf.fit_transform(movies['tags'].values.astype('U')).tocsr().astype(np.float32)
+        terms, idf = tfidf.get_feature_names_out(), tfidf.idf_
+        if mode == "sparse":
+            print(f"🧮 Computing top-{top_k} neighbors in blocks of {block_rows} rows...")
+            k = max(0, min(top_k, len(movies) - 1))
+            neighbors = to_csr(*compute_neighbors(tfidf_matrix, np.arange(len(movies)), k, block_rows, workers))
+        elif mode == "dense":
+            print("🧮 Computing Similarity Matrix (this may take a moment)...")
+            cosine_sim = cosine_similarity(tfidf_matrix)
+
+    if dims > 0:
+        if update is not None and 'svd_components' in prev and 'ivf_centroids' in prev:
+            # Keep the previous projection and centroids, only re-assign rows to lists
+            components = np.asarray(prev['svd_components'])
+            centroids = np.asarray(prev['ivf_centroids'])
+            embeddings = project_embeddings(tfidf_matrix, components)
+        else:
+            print(f"📐 Building {dims}-dim embeddings and IVF index...")
+            embeddings, components = build_embeddings(tfidf_matrix, dims)
+            centroids = train_ivf(embeddings, ivf_lists or int(np.sqrt(len(movies))))
+        list_indptr, list_rows = inverted_lists(assign_lists(embeddings, centroids), len(centroids))
 
     print("💾 Saving models...")
+    # The full catalog stays available for offline tooling; the API only maps the artifact below
     movies.to_pickle(os.path.join(OUTPUT_DIR, 'movies.pkl'))
-    with open(os.path.join(OUTPUT_DIR, 'similarity.pkl'), 'wb') as f:
-        pickle.dump(cosine_sim, f)
+    # Card data the API serves without calling TMDB (image paths learned at runtime are kept),
+    # plus the people the intent parser recognizes in queries
+    save_catalog(CATALOG_PATH, catalog_rows(movies), catalog_people(movies))
+
+    # L2-normalized TF-IDF rows, kept so the API can score user profiles against the catalog
+    tfidf_matrix = tfidf_matrix.tocsr().astype(np.float32)
+    arrays = {
+        'movie_ids': movies['id'].to_numpy(dtype=np.int64),
+        'titles': movies['title_x'].fillna('').to_numpy(dtype=str),
+        'row_hashes': hashes,
+        'tfidf_data': tfidf_matrix.data,
+        'tfidf_indices': tfidf_matrix.indices.astype(np.int32),
+        'tfidf_indptr': tfidf_matrix.indptr.astype(np.int64),
+        'tfidf_terms': np.asarray(terms).astype(str),
+        'tfidf_idf': np.asarray(idf, dtype=np.float64),
+    }
+    # Inverted index for /search over titles and overviews
+    arrays.update(build_search_index(
+        arrays['titles'], movies['overview'].fillna(''), movies['original_language'].fillna(''),
+        [[g['id'] for g in genres] for genres in movies['genre_list']]
+    ))
+    if mode == "sparse":
+        indptr, indices, scores = neighbors
+        arrays.update(neighbor_indptr=indptr, neighbor_indices=indices, neighbor_scores=scores)
+        print(f"   Kept top {top_k} neighbors per movie ({indices.nbytes + scores.nbytes:,} bytes)")
+    elif mode == "dense":
+        arrays['similarity'] = cosine_sim.astype(np.float32)
+    else:
+        print(f"   No neighbor data, {embeddings.shape[1]}-dim embeddings only ({embeddings.nbytes:,} bytes)")
+    if dims > 0:
+        arrays.update(embeddings=embeddings, svd_components=components, ivf_centroids=centroids.astype(np.float32),
+                      ivf_list_indptr=list_indptr, ivf_list_rows=list_rows)
+
+    meta = save_artifacts(MODEL_DIR, arrays, {
+        'similarity': mode,
+        'top_k': min(top_k, len(movies) - 1) if mode == "sparse" else None,
+        'num_movies': len(movies),
+        'num_terms': len(arrays['tfidf_terms']),
+        'search_terms': len(arrays['search_terms']),
+        'build': 'incremental' if update is not None else 'full',
+        'embedding_dims': int(embeddings.shape[1]) if dims > 0 else None,
+        'ivf_lists': len(centroids) if dims > 0 else None,
+    })
 
-    print("✅ Build complete! Models saved to backend/data/")
+    print(f"✅ Build complete in {time.time() - started:.1f}s! Saved version {meta['version']} to backend/data/model/")
 
 if __name__ == "__main__":
-    build_models()
+    parser = argparse.ArgumentParser(description="Build the recommender artifacts.")
+    parser.add_argument("--mode", choices=["sparse", "dense", "embedding"], default="sparse",
+                        help="sparse: top-K neighbor index (default), dense: full similarity matrix, "
+                             "embedding: SVD embeddings only, similarity computed at query time")
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K,
+                        help="neighbors kept per movie in sparse mode")
+    parser.add_argument("--incremental", action="store_true",
+                        help="update the current artifact, only re-processing new or changed movies")
+    parser.add_argument("--block-rows", type=int, default=BLOCK_ROWS,
+                        help="rows scored per block in sparse mode (bounds peak memory)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes used for sparse blocks (default: CPU count)")
+    parser.add_argument("--dims", type=int, default=EMBEDDING_DIMS,
+                        help="SVD embedding size for the IVF backend (0 skips embeddings and IVF)")
+    parser.add_argument("--ivf-lists", type=int, default=None,
+                        help="IVF inverted lists (default: sqrt of catalog size)")
+    args = parser.parse_args()
+    build_models(mode=args.mode, top_k=args.top_k, incremental=args.incremental,
+                 block_rows=args.block_rows, workers=args.workers, dims=args.dims, ivf_lists=args.ivf_lists)
@@ -0,0 +1,224 @@
+"""
+Caches for TMDB responses.
+
+LRUCache holds at most `max_entries` values and about `max_bytes` of payload
+(callers pass each value's size, e.g. the raw response length). Every entry
+carries its own TTL; expired entries are dropped on read and the least
+recently used ones are evicted whenever either bound is exceeded.
+
+An entry set with max_stale > 0 outlives its TTL by that many seconds:
+get() no longer returns it, but get_stale() does (flagged as stale) so callers
+can serve it while they refresh it.
+
+CacheBackend is the shared second level behind it (L2): every worker, and every
+restart, sees the same entries. SQLiteCache is the local implementation; a
+Redis-compatible backend only has to implement the same get/set/close coroutines.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, NamedTuple, Optional, Tuple
+
+
+class LRUCache:
+    def __init__(self, max_entries: int = 5000, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key -> (expires_at, stale_until, size, value), least recently used first
+        self._data: "OrderedDict[Hashable, Tuple[float, float, int, Any]]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[0] > time.time()
+
+    def _lookup(self, key: Hashable) -> Optional[Tuple[float, float, int, Any]]:
+        """The entry for key, dropping it once it is past even its stale bound."""
+        entry = self._data.get(key)
+        if entry is not None and entry[1] <= time.time():
+            self._remove(key)
+            self.expirations += 1
+            entry = None
+        return entry
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._lookup(key)
+        if entry is None or entry[0] <= time.time():
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[3]
+
+    def get_stale(self, key: Hashable, default: Any = None) -> Tuple[Any, bool]:
+        """(value, fresh). Past its TTL but within max_stale, the value comes back with fresh=False."""
+        entry = self._lookup(key)
+        if entry is None:
+            self.misses += 1
+            return default, False
+        self._data.move_to_end(key)
+        if entry[0] <= time.time():
+            self.stale_hits += 1
+            return entry[3], False
+        self.hits += 1
+        return entry[3], True
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """The stored value, fresh or stale, without touching LRU order or counters."""
+        entry = self._data.get(key)
+        return entry[3] if entry is not None else default
+
+    def set(self, key: Hashable, value: Any, ttl: float, size: int = 1, max_stale: float = 0) -> None:
+        if key in self._data:
+            self._remove(key)
+        if size > self.max_bytes:
+            return  # Would evict everything else and still not fit
+        expires_at = time.time() + ttl
+        self._data[key] = (expires_at, expires_at + max_stale, size, value)
+        self.bytes += size
+        while len(self._data) > self.max_entries or self.bytes > self.max_bytes:
+            self._remove(next(iter(self._data)))
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        if key in self._data:
+            self._remove(key)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.bytes = 0
+
+    def _remove(self, key: Hashable) -> None:
+        size = self._data.pop(key)[2]
+        self.bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self.bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class CacheEntry(NamedTuple):
+    value: Any
+    expires_at: float
+    stale_until: float
+    size: int  # Uncompressed payload bytes, used for the L1 byte bound
+
+
+def encode_value(value: Any) -> bytes:
+    """Compact JSON, zlib-compressed."""
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+
+
+def decode_value(blob: bytes) -> Any:
+    return json.loads(zlib.decompress(blob))
+
+
+class CacheBackend:
+    name = "base"
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        """The entry for key, or None if missing or past its stale_until."""
+        raise NotImplementedError
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        """Stores entry; it may be dropped any time after entry.stale_until."""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class SQLiteCache(CacheBackend):
+    name = "sqlite"
+    # Expired rows (and rows beyond max_rows, soonest to expire first) are swept every this many writes
+    PURGE_EVERY = 500
+
+    def __init__(self, path: str, table: str = "tmdb_cache", max_rows: Optional[int] = None):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.table = table
+        self.max_rows = max_rows
+        # One connection shared by the worker threads, serialized by the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")  # Readers in other workers never block on a writer
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+            "expires_at REAL NOT NULL, stale_until REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, size, expires_at, stale_until FROM {self.table} WHERE key = ? AND stale_until > ?",
+                (key, time.time()),
+            ).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(decode_value(row[0]), row[2], row[3], row[1])
+
+    def _set(self, key: str, entry: CacheEntry) -> None:
+        blob = encode_value(entry.value)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, size, expires_at, stale_until) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, entry.size, entry.expires_at, entry.stale_until),
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE stale_until <= ?", (time.time(),))
+                if self.max_rows:
+                    self._conn.execute(
+                        f"DELETE FROM {self.table} WHERE key IN "
+                        f"(SELECT key FROM {self.table} ORDER BY stale_until DESC LIMIT -1 OFFSET ?)",
+                        (self.max_rows,),
+                    )
+
+    async def get(self, key):
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key, entry):
+        await asyncio.to_thread(self._set, key, entry)
+
+    async def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_l2_cache(kind: str, path: str) -> Optional[CacheBackend]:
+    """The configured shared cache ("sqlite"), or None when disabled ("" / "none")."""
+    if not kind or kind == "none":
+        return None
+    if kind == "sqlite":
+        return SQLiteCache(path)
+    print(f"⚠️ Warning: unknown L2 cache backend '{kind}', running with the in-memory cache only.")
+    return None
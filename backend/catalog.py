@@ -0,0 +1,167 @@
+"""
+Local catalog store.
+
+build_models writes the card-level fields of every catalog movie (title,
+overview, genres, language, rating, release date) into a small SQLite file.
+TMDBClient loads it into memory and builds movie cards from it without any
+network call. The TMDB CSVs carry no image paths, so posters and backdrops are
+written back here the first time TMDB returns them, and later builds keep them.
+The people table lists the top-billed cast and the directors from the credits,
+for the local intent parser.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional
+
+from title_index import normalize_title
+
+SCHEMA = (
+    "CREATE TABLE movies ("
+    "id INTEGER PRIMARY KEY, title TEXT, overview TEXT, release_date TEXT, vote_average REAL, "
+    "genres TEXT, original_language TEXT, poster_path TEXT, backdrop_path TEXT)"
+)
+PEOPLE_SCHEMA = "CREATE TABLE people (name TEXT PRIMARY KEY, role TEXT, movies INTEGER)"
+COLUMNS = ("id", "title", "overview", "release_date", "vote_average", "genres",
+           "original_language", "poster_path", "backdrop_path")
+
+
+def _read_images(path: str) -> Dict[int, tuple]:
+    if not os.path.exists(path):
+        return {}
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute("SELECT id, poster_path, backdrop_path FROM movies").fetchall()
+    except sqlite3.DatabaseError:
+        rows = []
+    finally:
+        conn.close()
+    return {row[0]: row[1:] for row in rows if row[1] or row[2]}
+
+
+def save_catalog(path: str, movies: Iterable[Dict[str, Any]], people: Iterable[tuple] = ()) -> int:
+    """
+    Rewrites the catalog from `movies` (dicts with the TMDB details keys; genres as
+    [{"id", "name"}]) and `people` ((name, role, movie count) tuples), keeping image
+    paths already learned for the same ids. The file is swapped in atomically.
+    Returns the number of movies written.
+    """
+    images = _read_images(path)
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    count = 0
+    with conn:
+        conn.execute(SCHEMA)
+        for movie in movies:
+            poster, backdrop = images.get(movie["id"], (None, None))
+            conn.execute(
+                f"INSERT OR REPLACE INTO movies ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                (movie["id"], movie.get("title"), movie.get("overview"), movie.get("release_date"),
+                 movie.get("vote_average"), json.dumps(movie.get("genres") or []), movie.get("original_language"),
+                 movie.get("poster_path") or poster, movie.get("backdrop_path") or backdrop),
+            )
+            count += 1
+        conn.execute(PEOPLE_SCHEMA)
+        conn.executemany("INSERT OR REPLACE INTO people (name, role, movies) VALUES (?, ?, ?)", people)
+    conn.close()
+    os.replace(tmp_path, path)
+    return count
+
+
+class LocalCatalog:
+    def __init__(self, path: str):
+        self.path = path
+        # movie id -> details-shaped dict, the same shape TMDB's /movie/{id} returns
+        self._movies: Dict[int, Dict[str, Any]] = {}
+        # normalized title -> movie id (the lowest id wins for duplicate titles)
+        self._title_ids: Dict[str, int] = {}
+        # person name -> role ("director" or "cast")
+        self.people: Dict[str, str] = {}
+        # Image paths learned since the last write (movie id -> UPDATE parameters), and the task writing them
+        self._pending: Dict[int, tuple] = {}
+        self._writer: Optional[asyncio.Task] = None
+        self.load()
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        conn = sqlite3.connect(self.path)
+        rows, people = [], []
+        try:
+            rows = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM movies").fetchall()
+            has_people = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'people'").fetchone()
+            # Catalogs written before the people table existed have none
+            if has_people:
+                people = conn.execute("SELECT name, role FROM people").fetchall()
+        except sqlite3.DatabaseError as e:
+            print(f"⚠️ Warning: could not read local catalog {self.path}: {e}")
+        finally:
+            conn.close()
+        movies = {}
+        for row in rows:
+            movie = dict(zip(COLUMNS, row))
+            movie["genres"] = json.loads(movie["genres"] or "[]")
+            movie["genre_ids"] = [g["id"] for g in movie["genres"]]
+            movies[movie["id"]] = movie
+        self._movies = movies
+        self._title_ids = {}
+        for movie in movies.values():
+            self._title_ids.setdefault(normalize_title(movie["title"] or ""), movie["id"])
+        self._title_ids.pop("", None)
+        self.people = dict(people)
+
+    def __len__(self) -> int:
+        return len(self._movies)
+
+    def get(self, movie_id: int) -> Optional[Dict[str, Any]]:
+        return self._movies.get(movie_id)
+
+    def titles(self) -> List[str]:
+        return [movie["title"] for movie in self._movies.values() if movie["title"]]
+
+    def find_id(self, title: str) -> Optional[int]:
+        """Movie id for an exact (normalized) title match, or None."""
+        return self._title_ids.get(normalize_title(title))
+
+    def update_images(self, movie_id: int, poster_path: Optional[str], backdrop_path: Optional[str]) -> None:
+        """
+        Stores image paths TMDB returned for a catalog movie; a no-op if unknown or unchanged.
+        Cards see them at once; the file is updated in batches by a background thread.
+        """
+        movie = self._movies.get(movie_id)
+        if movie is None or (movie["poster_path"], movie["backdrop_path"]) == (poster_path, backdrop_path):
+            return
+        movie["poster_path"], movie["backdrop_path"] = poster_path, backdrop_path
+        self._pending[movie_id] = (poster_path, backdrop_path, movie_id)
+        if self._writer is None or self._writer.done():
+            try:
+                self._writer = asyncio.get_running_loop().create_task(self._flush())
+            except RuntimeError:
+                self._write_images(self._take_pending())  # No event loop (scripts): write right away
+
+    def _take_pending(self) -> List[tuple]:
+        batch, self._pending = list(self._pending.values()), {}
+        return batch
+
+    def _write_images(self, batch: List[tuple]) -> None:
+        try:
+            conn = sqlite3.connect(self.path, timeout=5)
+            with conn:
+                conn.executemany("UPDATE movies SET poster_path = ?, backdrop_path = ? WHERE id = ?", batch)
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"⚠️ Warning: could not save images for {len(batch)} movies: {e}")
+
+    async def _flush(self) -> None:
+        # Images learned while a batch is being written go out in the next one
+        while self._pending:
+            await asyncio.to_thread(self._write_images, self._take_pending())
+
+    async def close(self) -> None:
+        """Waits for image writes still queued."""
+        if self._writer is not None:
+            await self._writer
@@ -9,5 +9,57 @@ class Settings:
     TMDB_BASE_URL: str = "https://api.themoviedb.org/3"
     TMDB_IMAGE_BASE_URL: str = "https://image.tmdb.org/t/p/w500"
     TMDB_IMAGE_ORIGINAL_URL: str = "https://image.tmdb.org/t/p/original"
+    # TMDB response cache bounds (LRU; per-endpoint TTLs live in tmdb.py)
+    TMDB_CACHE_MAX_ENTRIES: int = int(os.getenv("TMDB_CACHE_MAX_ENTRIES", "5000"))
+    TMDB_CACHE_MAX_BYTES: int = int(os.getenv("TMDB_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    # How long past its TTL an entry may still be served while it is refreshed in the background
+    TMDB_CACHE_MAX_STALE: int = int(os.getenv("TMDB_CACHE_MAX_STALE", "3600"))
+    # Upstream TMDB traffic shaping (TMDB allows roughly 50 requests/s per IP)
+    TMDB_RATE_LIMIT: float = float(os.getenv("TMDB_RATE_LIMIT", "40"))
+    TMDB_RATE_BURST: int = int(os.getenv("TMDB_RATE_BURST", "40"))
+    TMDB_MAX_CONCURRENCY: int = int(os.getenv("TMDB_MAX_CONCURRENCY", "20"))
+    TMDB_MAX_RETRIES: int = int(os.getenv("TMDB_MAX_RETRIES", "3"))
+    TMDB_RETRY_BASE_DELAY: float = float(os.getenv("TMDB_RETRY_BASE_DELAY", "0.5"))
+    TMDB_MAX_RETRY_DELAY: float = float(os.getenv("TMDB_MAX_RETRY_DELAY", "10"))
+    # TMDB connection pool; HTTP/2 multiplexing needs the optional h2 package
+    TMDB_MAX_CONNECTIONS: int = int(os.getenv("TMDB_MAX_CONNECTIONS", "40"))
+    TMDB_MAX_KEEPALIVE: int = int(os.getenv("TMDB_MAX_KEEPALIVE", "20"))
+    TMDB_KEEPALIVE_EXPIRY: float = float(os.getenv("TMDB_KEEPALIVE_EXPIRY", "30"))
+    TMDB_HTTP2: bool = os.getenv("TMDB_HTTP2", "false").lower() == "true"
+    # Seconds before a slow list request gets a hedged duplicate; 0 disables hedging
+    TMDB_HEDGE_DELAY: float = float(os.getenv("TMDB_HEDGE_DELAY", "0.4"))
+    # Shared second-level TMDB cache across workers and restarts: "sqlite" or "none"
+    TMDB_L2_CACHE: str = os.getenv("TMDB_L2_CACHE", "sqlite")
+    TMDB_L2_CACHE_PATH: str = os.getenv(
+        "TMDB_L2_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "tmdb_cache.db"))
+    # /home list pre-warming; the interval must stay below the shortest list TTL (trending, 10 min)
+    TMDB_PREWARM_ENABLED: bool = os.getenv("TMDB_PREWARM_ENABLED", "true").lower() == "true"
+    TMDB_PREWARM_INTERVAL: int = int(os.getenv("TMDB_PREWARM_INTERVAL", "480"))
+    # Prewarm TMDB requests in flight at once
+    TMDB_PREWARM_CONCURRENCY: int = int(os.getenv("TMDB_PREWARM_CONCURRENCY", "16"))
+    # Local catalog written by build_models; movie cards are served from it before asking TMDB
+    CATALOG_DB_PATH: str = os.getenv(
+        "CATALOG_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "catalog.db"))
+    # Upper bound on how long an assembled /home payload is reused (list refreshes drop it sooner)
+    HOME_CACHE_TTL: int = int(os.getenv("HOME_CACHE_TTL", "120"))
+    # How long a user's "For You" picks are reused before rescoring (list changes drop them sooner)
+    FOR_YOU_CACHE_TTL: int = int(os.getenv("FOR_YOU_CACHE_TTL", "1800"))
+    # LLM calls: concurrent calls per worker and per-call timeout (seconds, queueing included)
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+    LLM_TIMEOUT: float = float(os.getenv("LLM_TIMEOUT", "15"))
+    # /search answers from the local index alone when it finds at least this many movies, else TMDB fills in
+    SEARCH_LOCAL_MIN_RESULTS: int = int(os.getenv("SEARCH_LOCAL_MIN_RESULTS", "5"))
+    # /search/smart asks the LLM only when the local intent parser recognized less than this share of the query
+    INTENT_CONFIDENCE_THRESHOLD: float = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.75"))
+    # LLM answer cache: in-memory entries, on-disk rows ("" for LLM_CACHE_PATH keeps it in memory only)
+    LLM_CACHE_TTL: int = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+    LLM_CACHE_MAX_ROWS: int = int(os.getenv("LLM_CACHE_MAX_ROWS", "100000"))
+    LLM_CACHE_PATH: str = os.getenv(
+        "LLM_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "llm_cache.db"))
+    # Recommender neighbor backend: "exact" (precomputed lists/matrix) or "ivf" (approximate)
+    RECOMMENDER_BACKEND: str = os.getenv("RECOMMENDER_BACKEND", "exact")
+    # Inverted lists probed per IVF query; higher means better recall, lower QPS
+    IVF_NPROBE: int = int(os.getenv("IVF_NPROBE", "8"))
 
 settings = Settings()
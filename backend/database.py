@@ -1,3 +1,4 @@
+import os
 from sqlmodel import SQLModel, create_engine, Field, Session, Relationship
 from typing import Optional, List
 from datetime import datetime, timedelta
@@ -0,0 +1,121 @@
+"""
+Assembled /home payloads, cached per region.
+
+Everything on /home except the "For You" row is identical for every user of a
+country, so those sections are built and serialized once per region and reused
+as raw JSON bytes. Each entry remembers the TMDB cache keys it was built from and
+is dropped as soon as TMDBClient reports that one of them returned different
+data, and after HOME_CACHE_TTL at the latest (which also keeps
+stale-while-revalidate refreshes flowing). Other regions' entries are untouched.
+
+Responses carry an ETag over the shared sections plus the user's own row, so an
+unchanged home page costs a 304 and no body at all.
+"""
+import hashlib
+import itertools
+import json
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from cache import LRUCache
+from config import settings
+from tmdb import tmdb
+
+def _serialize(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()[:16]
+
+
+def build_sections(region_name: str, lists: List[Any]) -> List[Dict[str, Any]]:
+    def safe_list(data):
+        return data if isinstance(data, list) else []
+
+    trending, popular, top_rated, upcoming, action, comedy = lists
+    return [
+        {"title": f"Trending in {region_name}", "data": safe_list(trending)},
+        {"title": f"Popular in {region_name}", "data": safe_list(popular)},
+        {"title": "Top Rated", "data": safe_list(top_rated)},
+        {"title": "Upcoming Releases", "data": safe_list(upcoming)},
+        {"title": "Action Thrillers", "data": safe_list(action)},
+        {"title": "Comedy Hits", "data": safe_list(comedy)},
+    ]
+
+
+class HomePayloadCache:
+    def __init__(self, ttl: int = settings.HOME_CACHE_TTL):
+        self.ttl = ttl
+        # (region, country_name) -> (serialized sections without the brackets, etag)
+        self._cache = LRUCache(max_entries=256)
+        # TMDB cache key -> the (region, country_name) entries built from it
+        self._key_regions: Dict[str, Set[Tuple[Optional[str], Optional[str]]]] = {}
+        # Keys read by payloads being assembled right now, by build id; a refresh of one of
+        # them marks that build stale so its (old) payload is not stored
+        self._builds: Dict[int, Set[str]] = {}
+        self._stale_builds: Set[int] = set()
+        self._build_ids = itertools.count()
+        tmdb.add_refresh_listener(self._on_refresh)
+
+    def _on_refresh(self, endpoint: str, key: str) -> None:
+        for region in self._key_regions.pop(key, ()):
+            self._cache.pop(region)
+        for build_id, keys in self._builds.items():
+            if key in keys:
+                self._stale_builds.add(build_id)
+
+    def invalidate(self) -> None:
+        self._stale_builds.update(self._builds)
+        self._key_regions.clear()
+        self._cache.clear()
+
+    async def get_sections(self, region: Optional[str], country_name: Optional[str]) -> Tuple[bytes, str]:
+        """The region's shared sections as a JSON array body (no brackets), and their ETag."""
+        key = (region, country_name)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        build_id = next(self._build_ids)
+        try:
+            with tmdb.collect_keys() as keys:
+                self._builds[build_id] = keys
+                lists = await tmdb.get_home_lists(region=region, country_name=country_name)
+        finally:
+            self._builds.pop(build_id, None)
+            stale = build_id in self._stale_builds
+            self._stale_builds.discard(build_id)
+        sections = _serialize(build_sections(country_name or "Global", lists))[1:-1]
+        entry = (sections, _digest(sections))
+        # A failed list is retried on the next request instead of being cached as empty
+        if not stale and not any(isinstance(r, Exception) for r in lists):
+            self._cache.set(key, entry, ttl=self.ttl, size=len(sections))
+            for used in keys:
+                self._key_regions.setdefault(used, set()).add(key)
+        return entry
+
+    def render(self, region_name: str, sections: bytes, etag: str,
+               for_you_row: Optional[List[Dict[str, Any]]]) -> Tuple[bytes, str]:
+        """Full /home body and its ETag, with the personalized row (if any) first."""
+        parts = [sections]
+        if for_you_row:
+            for_you = _serialize({"title": "For You", "data": for_you_row})
+            parts.insert(0, for_you)
+            etag = f"{etag}-{_digest(for_you)}"
+        body = b'{"region":' + _serialize(region_name) + b',"sections":[' + b",".join(parts) + b"]}"
+        return body, f'"{etag}"'
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    return "*" in tags or etag in [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+
+
+# Singleton instance
+home_cache = HomePayloadCache()
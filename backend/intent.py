@@ -0,0 +1,219 @@
+"""
+Local intent parser for /search/smart.
+
+A query is matched word by word against one Aho-Corasick automaton compiled from
+every TMDB genre (plus common spellings), mood words, decade words, the catalog's
+titles and the people from its credits; years and decades written as numbers
+are read directly. The share of the query's meaningful words that were
+recognized is the confidence, and LLMService only asks the LLM when it is below
+INTENT_CONFIDENCE_THRESHOLD.
+"""
+import re
+from collections import deque
+from typing import Any, Dict, Iterable, List, Tuple
+
+from tmdb import TMDBClient, tmdb
+from title_index import normalize_title
+
+# Words that carry no intent of their own; they neither count for nor against the confidence
+FILLER_WORDS = {
+    "a", "an", "the", "and", "or", "of", "in", "on", "to", "for", "with", "by", "from", "about", "at",
+    "movie", "movies", "film", "films", "flick", "flicks", "show", "me", "find", "give", "recommend",
+    "i", "want", "watch", "some", "any", "something", "like", "similar", "good", "best", "great", "top",
+    "please", "starring", "featuring", "directed", "director", "actor", "actress", "made", "released",
+    "set", "era", "year", "years", "decade", "my", "his", "her", "their", "our", "your", "its",
+}
+
+# Extra spellings for TMDB genre names (the names themselves and their plurals are always known)
+GENRE_ALIASES = {
+    "sci fi": 878, "scifi": 878, "sf": 878, "animated": 16, "anime": 16, "cartoon": 16, "cartoons": 16,
+    "rom com": 10749, "romcom": 10749, "romantic comedy": 10749, "romantic": 10749, "musical": 10402,
+    "musicals": 10402, "historical": 36, "kids": 10751, "thriller": 53, "suspense": 53, "whodunit": 9648,
+    "superhero": 28, "docs": 99,
+}
+
+# Mood words, with the genre they suggest when the query names none
+MOODS = {
+    "sad": 18, "emotional": 18, "tearjerker": 18, "happy": 35, "funny": 35, "hilarious": 35,
+    "feel good": 35, "lighthearted": 35, "light hearted": 35, "dark": 53, "gritty": 80, "intense": 53,
+    "thrilling": 53, "suspenseful": 53, "tense": 53, "scary": 27, "creepy": 27, "terrifying": 27,
+    "spooky": 27, "heartwarming": 10751, "wholesome": 10751, "cozy": 10751, "epic": 12, "mind bending": 878,
+    "uplifting": None, "inspiring": None, "relaxing": None, "chill": None, "quirky": None, "weird": None,
+}
+
+DECADE_WORDS = {
+    "twenties": 1920, "thirties": 1930, "forties": 1940, "fifties": 1950, "sixties": 1960,
+    "seventies": 1970, "eighties": 1980, "nineties": 1990, "noughties": 2000,
+}
+
+YEAR = re.compile(r"^(18[89]\d|19\d\d|20\d\d)$")
+# "1990s", "90s" ("90's" is folded into "90s" before normalizing)
+DECADE = re.compile(r"^(1[89]|20)?(\d)0s$")
+_APOSTROPHE_S = re.compile(r"(\d)['’]s\b")
+
+# On equal length, the earlier kind wins ("war" is the genre before it is a title)
+KIND_PRIORITY = {"genre": 0, "mood": 1, "decade": 2, "person": 3, "title": 4}
+_LEADING_ARTICLE = re.compile(r"^(the|a|an) ")
+
+
+def _plural(word: str) -> str:
+    return word[:-1] + "ies" if word.endswith("y") else word + "s"
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton over words: finds every known phrase in a query in one pass."""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # node -> (phrase length in words, kind, value) for every phrase ending there
+        self._out: List[List[Tuple[int, str, Any]]] = [[]]
+        self.phrases = 0
+
+    def add(self, phrase: str, kind: str, value: Any) -> None:
+        words = normalize_title(phrase).split()
+        if not words:
+            return
+        node = 0
+        for word in words:
+            nxt = self._goto[node].get(word)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][word] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(words), kind, value))
+        self.phrases += 1
+
+    def build(self) -> None:
+        """Computes the failure links; call once after the last add()."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for word, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and word not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(word, 0)
+                self._fail[child] = target if target != child else 0
+                # A phrase ending here also ends every suffix phrase
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find(self, words: List[str]) -> List[Tuple[int, int, str, Any]]:
+        """Every (start, end, kind, value) phrase occurrence in words, end exclusive."""
+        matches = []
+        node = 0
+        for i, word in enumerate(words):
+            while node and word not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(word, 0)
+            for length, kind, value in self._out[node]:
+                matches.append((i + 1 - length, i + 1, kind, value))
+        return matches
+
+
+class IntentParser:
+    def __init__(self, titles: Iterable[str] = (), people: Iterable[str] = ()):
+        self.matcher = PhraseMatcher()
+        for gid, name in TMDBClient.GENRE_MAP.items():
+            self.matcher.add(name, "genre", gid)
+            self.matcher.add(_plural(normalize_title(name)), "genre", gid)
+        for alias, gid in GENRE_ALIASES.items():
+            self.matcher.add(alias, "genre", gid)
+        for mood in MOODS:
+            self.matcher.add(mood, "mood", mood)
+        for word, decade in DECADE_WORDS.items():
+            self.matcher.add(word, "decade", decade)
+        for name in people:
+            self.matcher.add(name, "person", name)
+        for title in titles:
+            normalized = normalize_title(title or "")
+            # Titles made only of filler words ("It", "Her") would match almost any query
+            if not normalized or all(word in FILLER_WORDS for word in normalized.split()):
+                continue
+            self.matcher.add(normalized, "title", title)
+            stripped = _LEADING_ARTICLE.sub("", normalized)
+            if stripped != normalized:
+                self.matcher.add(stripped, "title", title)  # "dark knight" finds "The Dark Knight"
+        self.matcher.build()
+
+    @classmethod
+    def from_catalog(cls, catalog) -> "IntentParser":
+        return cls(titles=catalog.titles(), people=catalog.people)
+
+    def parse(self, query: str) -> Tuple[Dict[str, Any], float]:
+        """The intent dict (same keys as the LLM's, plus "decade") and a confidence in [0, 1]."""
+        words = normalize_title(_APOSTROPHE_S.sub(r"\1s", query)).split()
+        intent = {"type": "search", "keywords": " ".join(words), "genre": None, "year": None,
+                  "mood": None, "decade": None}
+        covered = [False] * len(words)
+
+        for i, word in enumerate(words):
+            if YEAR.match(word):
+                intent["year"] = intent["year"] or int(word)
+                covered[i] = True
+            else:
+                decade = DECADE.match(word)
+                if decade:
+                    century = decade.group(1)
+                    digit = int(decade.group(2))
+                    if century:
+                        intent["decade"] = int(century) * 100 + digit * 10
+                    else:
+                        intent["decade"] = (1900 if digit >= 3 else 2000) + digit * 10
+                    covered[i] = True
+
+        # Longest phrases first, then by kind; each word belongs to at most one phrase
+        matches = sorted(self.matcher.find(words), key=lambda m: (m[0] - m[1], KIND_PRIORITY[m[2]], m[0]))
+        title = person = title_span = mood_span = None
+        for start, end, kind, value in matches:
+            if any(covered[start:end]):
+                continue
+            covered[start:end] = [True] * (end - start)
+            if kind == "genre":
+                intent["genre"] = intent["genre"] or value
+            elif kind == "mood" and intent["mood"] is None:
+                intent["mood"], mood_span = value, (start, end)
+            elif kind == "decade":
+                intent["decade"] = intent["decade"] or value
+            elif kind == "person":
+                person = person or value
+            elif kind == "title" and title is None:
+                title, title_span = value, (start, end)
+
+        meaningful = sum(1 for word, hit in zip(words, covered) if hit or word not in FILLER_WORDS)
+        if title:
+            start, end = title_span
+            # A title is the subject only when it is most of the query and nothing else asks for a kind
+            # of movie ("intense thriller with a big twist" is not a search for "Big"); otherwise its
+            # words count as unrecognized, so a mixed query goes to the LLM
+            if (end - start) * 2 <= meaningful or intent["genre"] or intent["mood"] or intent["decade"]:
+                covered[start:end] = [False] * (end - start)
+                title = None
+
+        if intent["genre"] is None and intent["mood"]:
+            intent["genre"] = MOODS[intent["mood"]]
+            # A mood that suggests no genre ("uplifting") gives discover nothing to act on without a
+            # year or decade, so it is left for the LLM
+            if intent["genre"] is None and not (intent["year"] or intent["decade"]):
+                start, end = mood_span
+                covered[start:end] = [False] * (end - start)
+                intent["mood"] = None
+
+        leftover = [word for word, hit in zip(words, covered) if not hit and word not in FILLER_WORDS]
+        if title:
+            intent.update(type="search", keywords=title)
+        elif person:
+            intent.update(type="person", keywords=person)
+        elif intent["genre"] or intent["mood"] or intent["year"] or intent["decade"]:
+            intent.update(type="recommendation", keywords=" ".join(leftover))
+
+        confidence = (meaningful - len(leftover)) / meaningful if meaningful else 0.0
+        return intent, round(confidence, 3)
+
+
+# Singleton instance, compiled from the local catalog
+intent_parser = IntentParser.from_catalog(tmdb.catalog)
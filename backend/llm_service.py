@@ -1,7 +1,15 @@
 import os
 import json
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional
 
+from cache import CacheEntry, LRUCache, SQLiteCache
+from config import settings
+from intent import intent_parser
+from title_index import normalize_title
+
 # Make google.generativeai optional
 try:
     import google.generativeai as genai
@@ -10,6 +18,17 @@ except ImportError:
     GENAI_AVAILABLE = False
     print("⚠️ Warning: google-generativeai not installed. LLM features will be simulated.")
 
+# Bump when a prompt changes so answers to the old prompt are not served
+PROMPT_VERSION = 1
+MODEL_NAME = 'gemini-pro'
+
+
+def normalize_query(text: str, ignore_order: bool = False) -> str:
+    """Cache key text: case, accents, punctuation and spacing ignored; optionally word order too."""
+    words = normalize_title(text).split()
+    return " ".join(sorted(words) if ignore_order else words)
+
+
 class LLMService:
     def __init__(self):
         self.api_key = os.getenv("GEMINI_API_KEY")
@@ -19,10 +38,81 @@ class LLMService:
             print("⚠️ Warning: google-generativeai not installed. LLM features will be simulated.")
         elif self.api_key:
             genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel('gemini-pro')
+            self.model = genai.GenerativeModel(MODEL_NAME)
         else:
             print("⚠️ Warning: GEMINI_API_KEY not found. LLM features will be simulated.")
 
+        # LLM calls never run on the event loop: the SDK's async API when it has one,
+        # otherwise this dedicated pool. Both are capped at LLM_MAX_CONCURRENCY calls.
+        self._executor = ThreadPoolExecutor(max_workers=settings.LLM_MAX_CONCURRENCY, thread_name_prefix="llm")
+        self._slots = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+
+        # Answers are cached under normalized keys: in memory, and on disk so they survive restarts
+        self._cache = LRUCache(max_entries=settings.LLM_CACHE_MAX_ENTRIES, max_bytes=16 * 1024 * 1024)
+        self._store = None
+        if settings.LLM_CACHE_PATH:
+            self._store = SQLiteCache(settings.LLM_CACHE_PATH, table="llm_cache", max_rows=settings.LLM_CACHE_MAX_ROWS)
+        self._disk_hits = 0
+        # /search/smart intents answered by the local parser vs. sent to the LLM
+        self._local_intents = 0
+        self._llm_intents = 0
+
+    def close(self):
+        # Abandoned (timed out) calls finish in the background; queued ones are dropped
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        stats = self._cache.stats()
+        lookups = stats["hits"] + stats["misses"]
+        stats["disk_hits"] = self._disk_hits
+        # Share of LLM calls saved, from either tier
+        stats["hit_rate"] = round((stats["hits"] + self._disk_hits) / lookups, 4) if lookups else None
+        stats["local_intents"] = self._local_intents
+        stats["llm_intents"] = self._llm_intents
+        return stats
+
+    async def _cache_get(self, key: str) -> Any:
+        value = self._cache.get(key)
+        if value is not None or self._store is None:
+            return value
+        try:
+            entry = await self._store.get(key)
+        except Exception as e:
+            print(f"⚠️ LLM cache read failed: {e!r}")
+            return None
+        if entry is None:
+            return None
+        self._disk_hits += 1
+        self._cache.set(key, entry.value, ttl=entry.expires_at - time.time(), size=entry.size)
+        return entry.value
+
+    async def _cache_set(self, key: str, value: Any) -> None:
+        # Only real LLM answers are stored, never the local/simulated fallbacks
+        size = len(json.dumps(value))
+        self._cache.set(key, value, ttl=settings.LLM_CACHE_TTL, size=size)
+        if self._store is not None:
+            expires_at = time.time() + settings.LLM_CACHE_TTL
+            try:
+                await self._store.set(key, CacheEntry(value, expires_at, expires_at, size))
+            except Exception as e:
+                print(f"⚠️ LLM cache write failed: {e!r}")
+
+    async def _generate(self, prompt: str) -> str:
+        """
+        One LLM call, off the event loop. Raises asyncio.TimeoutError after LLM_TIMEOUT seconds,
+        waiting for a free slot included; cancelling the caller cancels the call.
+        """
+        async def call():
+            async with self._slots:
+                if hasattr(self.model, "generate_content_async"):
+                    response = await self.model.generate_content_async(prompt)
+                else:
+                    loop = asyncio.get_running_loop()
+                    response = await loop.run_in_executor(self._executor, self.model.generate_content, prompt)
+            return response.text.strip()
+
+        return await asyncio.wait_for(call(), timeout=settings.LLM_TIMEOUT)
+
     async def get_similar_movies(self, movie_name: str, user_country: str = None) -> Dict[str, List[str]]:
         """
         Generates similar movie recommendations using the user's specific prompt rules.
@@ -30,6 +120,11 @@ class LLMService:
         if not self.model:
             return self._get_simulated_recommendations(movie_name)
 
+        cache_key = f"similar:{MODEL_NAME}:{PROMPT_VERSION}:{normalize_query(user_country or '')}:{normalize_query(movie_name)}"
+        cached = await self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
         country_rule = ""
         if user_country:
             country_rule = f"6. PRIORITIZE movies from {user_country} if they match the language/style."
@@ -56,26 +151,37 @@ class LLMService:
         """
 
         try:
-            response = self.model.generate_content(prompt)
-            text = response.text.strip()
+            text = await self._generate(prompt)
             # Clean up potential markdown code blocks
             if text.startswith("```json"):
                 text = text[7:-3]
             elif text.startswith("```"):
                 text = text[3:-3]
                 
-            return json.loads(text)
+            result = json.loads(text)
+            await self._cache_set(cache_key, result)
+            return result
         except Exception as e:
-            print(f"❌ LLM Error: {e}")
+            print(f"❌ LLM Error: {e!r}")
             return self._get_simulated_recommendations(movie_name)
 
     async def parse_intent(self, query: str) -> Dict[str, Any]:
         """
         Analyzes a natural language query to extract intent and entities.
+        The local parser answers when it is confident enough; only the rest goes to the LLM.
         """
-        if not self.model:
-            return self._parse_intent_heuristic(query)
+        local, confidence = intent_parser.parse(query)
+        if not self.model or confidence >= settings.INTENT_CONFIDENCE_THRESHOLD:
+            self._local_intents += 1
+            return local
+
+        # Word order rarely changes intent ("comedy 90s" == "90s comedy")
+        cache_key = f"intent:{MODEL_NAME}:{PROMPT_VERSION}:{normalize_query(query, ignore_order=True)}"
+        cached = await self._cache_get(cache_key)
+        if cached is not None:
+            return cached
 
+        self._llm_intents += 1
         prompt = f"""
         Analyze this movie search query: "{query}"
         
@@ -90,14 +196,16 @@ class LLMService:
         """
         
         try:
-            response = self.model.generate_content(prompt)
-            text = response.text.strip()
+            text = await self._generate(prompt)
             if text.startswith("```json"):
                 text = text[7:-3]
-            return json.loads(text)
+            result = json.loads(text)
+            result.setdefault("decade", None)
+            await self._cache_set(cache_key, result)
+            return result
         except Exception as e:
-            print(f"❌ LLM Intent Error: {e}")
-            return self._parse_intent_heuristic(query)
+            print(f"❌ LLM Intent Error: {e!r}")
+            return local
 
     def _get_simulated_recommendations(self, movie_name: str) -> Dict[str, List[str]]:
         """Fallback for when LLM is unavailable"""
@@ -111,28 +219,4 @@ class LLMService:
             ]
         }
 
-    def _parse_intent_heuristic(self, query: str) -> Dict[str, Any]:
-        """Original regex-based heuristic fallback"""
-        query = query.lower().strip()
-        intent = {
-            "type": "search",
-            "keywords": query,
-            "genre": None,
-            "year": None,
-            "mood": None
-        }
-        
-        genres = {
-            "action": 28, "comedy": 35, "horror": 27, "romance": 10749, 
-            "scifi": 878, "sci-fi": 878, "drama": 18, "animation": 16
-        }
-        
-        for name, gid in genres.items():
-            if name in query:
-                intent["genre"] = gid
-                intent["keywords"] = query.replace(name, "").strip()
-                intent["type"] = "recommendation"
-                
-        return intent
-
 llm_service = LLMService()
@@ -0,0 +1,117 @@
+"""
+Load test: /home latency while LLM-backed /search/smart calls are in flight.
+
+Runs the app in-process and swaps the Gemini model for a stand-in whose
+synchronous generate_content sleeps for --llm-latency seconds, like a slow
+real call. /home is timed first on an idle worker, then again while
+--smart-concurrency clients keep /search/smart busy. Pass --blocking to call
+the model directly on the event loop (the old LLMService behaviour) and see
+/home stall behind it.
+
+TMDB is called for real, so run it with network access (the first /home
+request warms the caches and is not counted).
+
+Usage: python loadtest_llm.py [--llm-latency 2.0] [--smart-concurrency 8] [--home-requests 50] [--blocking]
+"""
+import argparse
+import asyncio
+import itertools
+import time
+import uuid
+from types import SimpleNamespace
+
+import httpx
+import numpy as np
+
+from app import app
+from llm_service import llm_service
+
+# Nothing in it is recognized locally, and a counter makes every query distinct, so every
+# call goes to the model instead of the LLM answer cache
+LLM_QUERY = "something to watch on a rainy afternoon with my kid, take {n}"
+INTENT_JSON = '{"type": "search", "keywords": "inception", "genre": null, "year": null, "mood": null}'
+
+
+class SlowModel:
+    """Stands in for genai.GenerativeModel: synchronous and slow, no async API."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def generate_content(self, prompt):
+        time.sleep(self.latency)
+        return SimpleNamespace(text=INTENT_JSON)
+
+
+async def blocking_generate(prompt):
+    # What LLMService did before: the SDK call straight on the event loop
+    return llm_service.model.generate_content(prompt).text.strip()
+
+
+async def time_home(client, headers, count):
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = await client.get("/home", headers=headers)
+        timings.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+        await asyncio.sleep(0.02)
+    return np.percentile(timings, 50), np.percentile(timings, 99)
+
+
+async def smart_search_loop(client, stop, done, counter):
+    while not stop.is_set():
+        await client.get("/search/smart", params={"query": LLM_QUERY.format(n=next(counter))})
+        done.append(1)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-latency", type=float, default=2.0)
+    parser.add_argument("--smart-concurrency", type=int, default=8)
+    parser.add_argument("--home-requests", type=int, default=50)
+    parser.add_argument("--blocking", action="store_true")
+    args = parser.parse_args()
+
+    llm_service.model = SlowModel(args.llm_latency)
+    # The stand-in's answers must never reach the real on-disk LLM cache (or be served from it)
+    llm_service._store = None
+    llm_service._cache.clear()
+    if args.blocking:
+        llm_service._generate = blocking_generate
+
+    transport = httpx.ASGITransport(app=app)
+    # Runs the app's startup/shutdown handlers around the test
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=120) as client:
+            email = f"loadtest-{uuid.uuid4().hex[:8]}@cineverse.test"
+            token = (await client.post("/register", json={
+                "full_name": "Load Test", "email": email, "password": uuid.uuid4().hex,
+            })).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+            await client.get("/home", headers=headers)  # warm-up
+
+            idle = await time_home(client, headers, args.home_requests)
+
+            stop, done, counter = asyncio.Event(), [], itertools.count()
+            loops = [asyncio.create_task(smart_search_loop(client, stop, done, counter))
+                     for _ in range(args.smart_concurrency)]
+            await asyncio.sleep(0.1)
+            started = time.perf_counter()
+            loaded = await time_home(client, headers, args.home_requests)
+            elapsed = time.perf_counter() - started
+            stop.set()
+            await asyncio.gather(*loops)
+
+    mode = "blocking (on event loop)" if args.blocking else "non-blocking"
+    print(f"LLM calls: {mode}, {args.llm_latency}s each, {args.smart_concurrency} concurrent /search/smart clients")
+    print(f"{'/home':<28}{'p50 (ms)':>10}{'p99 (ms)':>10}")
+    print(f"{'idle':<28}{idle[0]:>10.1f}{idle[1]:>10.1f}")
+    print(f"{'with LLM calls in flight':<28}{loaded[0]:>10.1f}{loaded[1]:>10.1f}")
+    print(f"/search/smart completed during the loaded phase: {len(done)} in {elapsed:.1f}s")
+    stats = llm_service.cache_stats()
+    print(f"LLM intent calls: {stats['llm_intents']}, answer cache hits: {stats['hits']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,194 @@
+"""
+Neighbor backends for MovieRecommender.
+
+Each backend answers "which catalog rows are most similar to row i" from the
+same model artifact:
+- SparseIndexBackend: precomputed exact top-K lists (default build)
+- DenseMatrixBackend: the full N×N matrix (build_models --mode dense)
+- EmbeddingBackend: exact search over the SVD embeddings, one matrix-vector
+  product per query (build_models --mode embedding, no neighbor data at all)
+- IVFBackend: approximate. An inverted file over reduced-dimension embeddings
+  picks candidate rows, which are then re-ranked by exact TF-IDF cosine.
+  Nothing N×N is built or stored, so it scales to catalogs far larger than TMDB 5000.
+"""
+from typing import List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+
+def top_k_indices(scores, k: int, exclude=None) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first, never returning `exclude`.
+    Uses argpartition, so the cost is O(N) plus sorting only the k winners.
+    """
+    scores = np.array(scores, dtype=np.float32)  # private copy; the model arrays are read-only maps
+    if exclude is not None:
+        scores[exclude] = -np.inf
+    k = min(k, int(np.count_nonzero(scores > -np.inf)))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+
+    part = np.argpartition(scores, -k)[-k:]
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+def top_k_rows(scores: np.ndarray, k: int):
+    """
+    Row-wise top-k of a 2D score matrix, returned as (indices, scores) arrays of
+    shape (rows, k), best first. Mask entries that must never win with -inf.
+    """
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.zeros((scores.shape[0], 0), dtype=np.int64), np.zeros((scores.shape[0], 0), dtype=scores.dtype)
+
+    # argpartition gives the k best per row in O(N), then only those k get sorted
+    part = np.argpartition(scores, -k, axis=1)[:, -k:]
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(part_scores, order, axis=1)
+
+
+class NeighborBackend:
+    name = "base"
+    exact = True
+
+    def __init__(self, num_rows: int):
+        self.num_rows = num_rows
+
+    def candidates(self, row: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows, scores) of every movie this backend considers similar to `row`, self excluded."""
+        raise NotImplementedError
+
+    def neighbors(self, row: int, k: int) -> np.ndarray:
+        """Rows of the k most similar movies, best first, never `row` itself."""
+        rows, scores = self.candidates(row)
+        return rows[top_k_indices(scores, k)]
+
+    def neighbors_batch(self, rows: np.ndarray, k: int) -> Tuple[List[np.ndarray], np.ndarray]:
+        """Per-row neighbors, plus all rows' similarity summed over the catalog (for blending)."""
+        per_row = []
+        blended = np.zeros(self.num_rows, dtype=np.float32)
+        for row in rows:
+            cand_rows, cand_scores = self.candidates(row)
+            per_row.append(cand_rows[top_k_indices(cand_scores, k)])
+            np.add.at(blended, cand_rows, cand_scores)
+        return per_row, blended
+
+
+class SparseIndexBackend(NeighborBackend):
+    name = "sparse"
+
+    def __init__(self, indptr, indices, scores):
+        super().__init__(len(indptr) - 1)
+        self.indptr, self.indices, self.scores = indptr, indices, scores
+        # The same index as a scipy CSR matrix, for batch row gathers
+        self.matrix = sp.csr_matrix((scores, indices, indptr), shape=(self.num_rows, self.num_rows))
+
+    def candidates(self, row):
+        start, end = self.indptr[row], self.indptr[row + 1]
+        rows, scores = self.indices[start:end], self.scores[start:end]
+        keep = rows != row
+        return rows[keep], scores[keep]
+
+    def neighbors(self, row, k):
+        # Lists are pre-sorted by score; self is excluded at build time and filtered again here
+        return self.candidates(row)[0][:k]
+
+    def neighbors_batch(self, rows, k):
+        sub = self.matrix[rows]
+        per_row = []
+        for i, row in enumerate(rows):
+            # Each CSR row keeps its build-time order, best first
+            neighbors = sub.indices[sub.indptr[i]:sub.indptr[i + 1]]
+            per_row.append(neighbors[neighbors != row][:k])
+        return per_row, np.asarray(sub.sum(axis=0), dtype=np.float32).ravel()
+
+
+class DenseMatrixBackend(NeighborBackend):
+    name = "dense"
+
+    def __init__(self, similarity):
+        super().__init__(len(similarity))
+        self.similarity = similarity
+
+    def scores(self, rows) -> np.ndarray:
+        """Similarity of `rows` (an int or an array) to every catalog row."""
+        return self.similarity[rows]
+
+    def candidates(self, row):
+        scores = np.array(self.scores(row), dtype=np.float32)
+        scores[row] = -np.inf
+        return np.arange(self.num_rows), scores
+
+    def neighbors(self, row, k):
+        return top_k_indices(self.scores(row), k, exclude=row)
+
+    def neighbors_batch(self, rows, k):
+        scores = np.array(self.scores(rows), dtype=np.float32)
+        scores[np.arange(len(rows)), rows] = -np.inf
+        top_indices, top_scores = top_k_rows(scores, k)
+        per_row = [indices[row_scores > -np.inf] for indices, row_scores in zip(top_indices, top_scores)]
+        scores[np.arange(len(rows)), rows] = 0
+        return per_row, scores.sum(axis=0)
+
+
+class EmbeddingBackend(DenseMatrixBackend):
+    name = "embedding"
+
+    def __init__(self, embeddings):
+        super().__init__(embeddings)
+        self.embeddings = embeddings
+
+    def scores(self, rows):
+        # Embeddings are L2-normalized, so the dot product is the cosine similarity
+        return self.embeddings[rows] @ self.embeddings.T
+
+
+class IVFBackend(NeighborBackend):
+    name = "ivf"
+    exact = False
+
+    def __init__(self, embeddings, centroids, list_indptr, list_rows, tfidf, nprobe: int = 8):
+        super().__init__(len(embeddings))
+        self.embeddings = embeddings
+        self.centroids = centroids
+        self.list_indptr = list_indptr
+        self.list_rows = list_rows
+        self.tfidf = tfidf
+        self.nprobe = nprobe
+
+    def candidate_rows(self, row: int, nprobe: Optional[int] = None) -> np.ndarray:
+        """Rows in the nprobe inverted lists whose centroids are closest to `row`."""
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        probes = top_k_indices(self.centroids @ self.embeddings[row], nprobe)
+        parts = [self.list_rows[self.list_indptr[p]:self.list_indptr[p + 1]] for p in probes]
+        rows = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+        return rows[rows != row]
+
+    def candidates(self, row):
+        rows = self.candidate_rows(row)
+        # Re-rank in the original TF-IDF space so scores match the exact backends
+        scores = (self.tfidf[rows] @ self.tfidf[row].T).toarray().ravel().astype(np.float32)
+        return rows, scores
+
+
+def create_backend(name: str, meta: dict, arrays: dict, tfidf=None, nprobe: int = 8) -> Optional[NeighborBackend]:
+    """
+    Builds the requested backend ("exact" or "ivf") from an opened artifact.
+    "exact" uses whichever exact format the artifact was built with. Falls back to it
+    when the artifact has no IVF index.
+    """
+    if name == "ivf":
+        if "ivf_centroids" in arrays and tfidf is not None:
+            return IVFBackend(arrays["embeddings"], arrays["ivf_centroids"], arrays["ivf_list_indptr"],
+                              arrays["ivf_list_rows"], tfidf, nprobe=nprobe)
+        print("⚠️ Warning: artifact has no IVF index, using the exact backend.")
+
+    if meta.get("similarity") == "sparse":
+        return SparseIndexBackend(arrays["neighbor_indptr"], arrays["neighbor_indices"], arrays["neighbor_scores"])
+    if meta.get("similarity") == "embedding":
+        return EmbeddingBackend(arrays["embeddings"])
+    if "similarity" in arrays:
+        return DenseMatrixBackend(arrays["similarity"])
+    return None
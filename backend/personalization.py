@@ -0,0 +1,59 @@
+"""
+"For You" row for the home page.
+
+A user's profile is the mean TF-IDF vector of their watchlist and favorites,
+boosted by their preferred genres, scored against the catalog in one pass.
+The recommended ids are cached per user for FOR_YOU_CACHE_TTL and dropped
+whenever one of those lists changes; cards are hydrated on every request
+(get_movie_cards caches them), so a TMDB hiccup or a model rebuild never
+stays pinned in the row.
+"""
+from typing import Any, Dict, List, Tuple
+
+from sqlmodel import Session, select
+
+from cache import LRUCache
+from config import settings
+from database import FavoriteItem, UserPreference, WatchlistItem
+from recommender import recommender
+from tmdb import tmdb
+
+
+class ForYouEngine:
+    def __init__(self, size: int = 12, max_users: int = 10000, ttl: float = settings.FOR_YOU_CACHE_TTL):
+        self.size = size
+        self.ttl = ttl
+        # user_id -> recommended movie ids, least recently used first
+        self._cache = LRUCache(max_entries=max_users)
+
+    def invalidate(self, user_id: int) -> None:
+        """Call whenever the user's watchlist, favorites or genre preferences change."""
+        self._cache.pop(user_id)
+
+    def _load_profile(self, user_id: int, session: Session) -> Tuple[List[int], List[str]]:
+        watchlist = session.exec(select(WatchlistItem.movie_id).where(WatchlistItem.user_id == user_id)).all()
+        favorites = session.exec(select(FavoriteItem.movie_id).where(FavoriteItem.user_id == user_id)).all()
+        prefs = session.exec(select(UserPreference).where(UserPreference.user_id == user_id)).first()
+
+        # Genre names ("Science Fiction") are TF-IDF terms too, since build_models adds them to the tags
+        terms = []
+        if prefs and prefs.preferred_genres:
+            for genre_id in prefs.preferred_genres.split(","):
+                name = tmdb.GENRE_MAP.get(int(genre_id)) if genre_id.strip().isdigit() else None
+                if name:
+                    terms.extend(name.lower().split())
+        return list(watchlist) + list(favorites), terms
+
+    async def get_row(self, user_id: int, session: Session) -> List[Dict[str, Any]]:
+        rec_ids = self._cache.get(user_id)
+        if rec_ids is None:
+            # Nothing is awaited between reading the lists and storing the ids, so an
+            # invalidation can never land in between and leave ids from old lists cached
+            movie_ids, terms = self._load_profile(user_id, session)
+            rec_ids = recommender.get_profile_recommendations(movie_ids, terms, k=self.size)
+            self._cache.set(user_id, rec_ids, ttl=self.ttl)
+        return await tmdb.get_movie_cards(rec_ids)
+
+
+# Singleton instance
+for_you = ForYouEngine()
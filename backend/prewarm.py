@@ -0,0 +1,85 @@
+"""
+Background pre-warmer for the /home lists.
+
+Every /home request needs six TMDB lists for the user's country. Without
+warming, the first user from each country after a TTL expiry pays for all six
+round-trips. HomePrewarmer refreshes the lists of every variant (global plus
+each country TMDBClient knows) on a fixed interval shorter than the shortest
+list TTL, so /home is always answered from cache. Countries sharing a language
+share most requests, so each distinct request is refreshed once per cycle, and
+a fresh response another worker already put in the shared L2 cache is reused.
+"""
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+from config import settings
+from tmdb import tmdb
+
+
+class HomePrewarmer:
+    def __init__(self, interval: float = settings.TMDB_PREWARM_INTERVAL,
+                 concurrency: int = settings.TMDB_PREWARM_CONCURRENCY):
+        self.interval = interval
+        # TMDB requests in flight at once
+        self.concurrency = concurrency
+        self._task: Optional[asyncio.Task] = None
+        self.last_run: Optional[float] = None
+        self.last_duration: Optional[float] = None
+
+    def variants(self) -> List[Tuple[Optional[str], Optional[str]]]:
+        """(region, country_name) pairs exactly as /home passes them, global first."""
+        countries = sorted(set(tmdb.COUNTRY_TO_REGION) | set(tmdb.COUNTRY_TO_LANGUAGES))
+        return [(None, None)] + [(tmdb.get_region_code(c), c) for c in countries]
+
+    def requests(self) -> Dict[str, Tuple[str, Optional[dict]]]:
+        """Cache key -> (endpoint, params) for every distinct list request behind the variants."""
+        requests = {}
+        for region, country_name in self.variants():
+            for endpoint, params in tmdb.home_list_requests(region, country_name):
+                requests.setdefault(tmdb.cache_key(endpoint, params), (endpoint, params))
+        return requests
+
+    async def warm_all(self) -> None:
+        started = time.monotonic()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def warm(key, endpoint, params):
+            async with semaphore:
+                try:
+                    # An L2 entry that would expire before the next cycle is refreshed now
+                    await tmdb.refresh_cached(endpoint, params, min_fresh=self.interval)
+                except Exception as e:
+                    print(f"⚠️ Prewarm failed for {key}: {e!r}")
+
+        await asyncio.gather(*[warm(key, endpoint, params) for key, (endpoint, params) in self.requests().items()])
+        self.last_run = time.time()
+        self.last_duration = time.monotonic() - started
+
+    async def _run(self) -> None:
+        while True:
+            started = time.monotonic()
+            try:
+                await self.warm_all()
+            except Exception as e:
+                print(f"⚠️ Prewarm cycle failed: {e!r}")
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            print(f"🔥 Prewarming /home lists for {len(self.variants())} regions "
+                  f"({len(self.requests())} TMDB requests) every {self.interval:.0f}s")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Singleton instance
+prewarmer = HomePrewarmer()
@@ -1,60 +1,175 @@
-import pandas as pd
-import pickle
+import numpy as np
+import scipy.sparse as sp
 import os
+from typing import Dict, Iterable, List, Optional
+
+from artifacts import load_artifacts
+from config import settings
+from neighbors import create_backend, top_k_indices
+from search_index import SearchIndex
+from title_index import TitleIndex
 
 class MovieRecommender:
     def __init__(self):
-        self.movies_df = None
-        self.cosine_sim = None
+        self.movie_ids = None
+        self.titles = None
+        # Lookup structures built once at load time
+        self.title_index = None
+        self.id_to_row = {}
+        # Answers "most similar rows to row i" (see neighbors.py)
+        self.backend = None
+        # TF-IDF rows (N × terms CSR) and term -> column, for scoring user profiles
+        self.tfidf = None
+        self.term_to_col = {}
+        # Full-text index over titles and overviews (see search_index.py)
+        self.search_index = None
+        self.meta = {}
         self.data_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+        self.model_path = os.path.join(self.data_path, "model")
 
     def load_data(self):
-        """Loads the pre-computed models from disk."""
+        """
+        Opens the pre-computed model artifact. Arrays are memory-mapped read-only,
+        so workers share one page-cache copy instead of each unpickling the model.
+        """
         try:
-            movies_path = os.path.join(self.data_path, "movies.pkl")
-            sim_path = os.path.join(self.data_path, "similarity.pkl")
-            
-            if os.path.exists(movies_path) and os.path.exists(sim_path):
-                self.movies_df = pd.read_pickle(movies_path)
-                with open(sim_path, 'rb') as f:
-                    self.cosine_sim = pickle.load(f)
-                print("✅ ML Models loaded successfully.")
-            else:
+            meta, arrays = load_artifacts(self.model_path)
+
+            if meta is None:
                 print("⚠️ Warning: ML artifacts not found. Recommendations will not work.")
-                self.movies_df = pd.DataFrame()
-                self.cosine_sim = []
+                return
+
+            self.meta = meta
+            self.movie_ids = arrays["movie_ids"]
+            self.titles = arrays["titles"]
+            self.title_index = TitleIndex(arrays["titles"])
+            self.id_to_row = {int(movie_id): row for row, movie_id in enumerate(self.movie_ids)}
+
+            if "tfidf_data" in arrays:
+                self.tfidf = sp.csr_matrix(
+                    (arrays["tfidf_data"], arrays["tfidf_indices"], arrays["tfidf_indptr"]),
+                    shape=(len(self.movie_ids), meta["num_terms"])
+                )
+                self.term_to_col = {str(term): col for col, term in enumerate(arrays["tfidf_terms"])}
+
+            if "search_terms" in arrays:
+                self.search_index = SearchIndex(arrays, self.titles)
+
+            self.backend = create_backend(settings.RECOMMENDER_BACKEND, meta, arrays, self.tfidf,
+                                          nprobe=settings.IVF_NPROBE)
+            backend_name = self.backend.name if self.backend else "none"
+            print(f"✅ ML Models loaded successfully ({backend_name} backend, {meta.get('num_movies')} movies).")
         except Exception as e:
             print(f"❌ Error loading ML models: {e}")
 
-    def get_recommendations(self, movie_name: str):
+    def find_row(self, movie_name: str) -> Optional[int]:
+        """Catalog row for a user-typed title: exact, then prefix, then partial match."""
+        if self.title_index is None:
+            return None
+        return self.title_index.lookup(movie_name)
+
+    def search(self, query: str, limit: int = 20, language: Optional[str] = None,
+               genre: Optional[int] = None) -> List[int]:
+        """TMDB IDs of the catalog movies best matching a free-text query, best first."""
+        if self.search_index is None:
+            return []
+        return self.movie_ids[self.search_index.search(query, limit, language, genre)].tolist()
+
+    def has_movie(self, movie_id: int) -> bool:
+        return movie_id in self.id_to_row
+
+    def get_recommendations(self, movie_name: str, k: int = 5) -> List[int]:
+        """
+        Returns the TMDB IDs of the k movies most similar to the best title match.
+        """
+        row = self.find_row(movie_name)
+        if row is None:
+            return []
+        return self._recommend_row(row, k)
+
+    def get_recommendations_by_id(self, movie_id: int, k: int = 5) -> List[int]:
+        """Same as get_recommendations, keyed by TMDB ID instead of title."""
+        row = self.id_to_row.get(movie_id)
+        if row is None:
+            return []
+        return self._recommend_row(row, k)
+
+    def get_recommendations_batch(self, ids: Iterable[int], k: int = 5, blend: bool = False) -> Dict:
         """
-        Returns a list of TMDB IDs for recommended movies.
+        Recommendations for many seed movies (TMDB IDs) in one backend call
+        (a single matrix gather for the exact backends).
+
+        Returns {"results": {seed_id: [ids]}, "blend": {"seeds": [...], "ids": [...]} or None}.
+        The blend sums the seeds' similarity rows ("because you liked X, Y, Z") and never
+        returns a seed. Seeds outside the catalog are skipped.
         """
-        if self.movies_df is None or self.movies_df.empty:
+        seed_ids = []
+        for movie_id in ids:
+            if movie_id in self.id_to_row and movie_id not in seed_ids:
+                seed_ids.append(movie_id)
+
+        response = {"results": {}, "blend": None}
+        if not seed_ids:
+            return response
+        seed_rows = np.array([self.id_to_row[movie_id] for movie_id in seed_ids])
+
+        if self.backend is None:
+            return response
+
+        per_seed, blended = self.backend.neighbors_batch(seed_rows, k)
+        for movie_id, neighbors in zip(seed_ids, per_seed):
+            response["results"][movie_id] = self.movie_ids[neighbors].tolist()
+
+        if blend:
+            blended[seed_rows] = -np.inf
+            # Candidates no seed scored at all are not recommendations
+            blended[blended <= 0] = -np.inf
+            response["blend"] = {
+                "seeds": seed_ids,
+                "ids": self.movie_ids[top_k_indices(blended, k)].tolist(),
+            }
+        return response
+
+    def get_profile_recommendations(self, movie_ids: Iterable[int], terms: Iterable[str] = (),
+                                    k: int = 20, term_weight: float = 0.5) -> List[int]:
+        """
+        Scores the whole catalog against a user profile in one sparse mat-vec.
+        The profile is the mean TF-IDF row of movie_ids, plus an optional boost for
+        vocabulary terms (e.g. preferred genre names). Seed movies are never returned.
+        """
+        if self.tfidf is None:
             return []
 
-        # Case insensitive partial match
-        matching = self.movies_df[self.movies_df['title_x'].str.lower().str.contains(movie_name.lower(), na=False)]
-        
-        if len(matching) == 0:
+        rows = [self.id_to_row[mid] for mid in set(movie_ids) if mid in self.id_to_row]
+        profile = np.zeros(self.tfidf.shape[1], dtype=np.float32)
+        if rows:
+            profile += np.asarray(self.tfidf[rows].mean(axis=0), dtype=np.float32).ravel()
+
+        cols = [self.term_to_col[t] for t in terms if t in self.term_to_col]
+        if cols:
+            boost = np.zeros_like(profile)
+            boost[cols] = 1.0
+            profile += term_weight * boost / np.linalg.norm(boost)
+
+        if not profile.any():
             return []
 
-        idx = matching.index[0]
-        
+        scores = self.tfidf @ profile
+        scores[scores <= 0] = -np.inf
+        return self.movie_ids[top_k_indices(scores, k, exclude=rows or None)].tolist()
+
+    def get_title(self, movie_id: int) -> Optional[str]:
+        row = self.id_to_row.get(movie_id)
+        return str(self.titles[row]) if row is not None else None
+
+    def _recommend_row(self, idx: int, k: int) -> List[int]:
         # Safety check for index bounds
-        if idx >= len(self.cosine_sim):
+        if self.backend is None or idx >= self.backend.num_rows:
             return []
+        top_indices = self.backend.neighbors(idx, k)
 
-        sim_scores = list(enumerate(self.cosine_sim[idx]))
-        sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
-        
-        # Get top 5 (excluding self at index 0)
-        top_indices = [i[0] for i in sim_scores[1:6]]
-        
-        # Return only the IDs (assuming 'id' column exists and matches TMDB ID)
-        # The original dataset 'tmdb_5000_movies.csv' has an 'id' column which IS the TMDB ID.
-        results = self.movies_df.iloc[top_indices]['id'].tolist()
-        return results
+        # Return only the IDs (the 'id' column of tmdb_5000_movies.csv IS the TMDB ID)
+        return self.movie_ids[top_indices].tolist()
 
 # Singleton instance
 recommender = MovieRecommender()
@@ -5,6 +5,9 @@ from database import get_session, User
 from auth import get_current_user
 from pydantic import BaseModel
 from datetime import datetime
+from tmdb import tmdb
+from home_cache import home_cache
+from llm_service import llm_service
 
 router = APIRouter(
     prefix="/admin",
@@ -78,3 +81,13 @@ async def get_all_users(
 ):
     users = session.exec(select(User)).all()
     return users
+
+@router.get("/cache")
+async def get_cache_stats(admin: User = Depends(get_current_admin)):
+    # TMDB response cache (size, hit/miss/eviction counters), upstream traffic and LLM answer cache, for this worker
+    return {
+        "tmdb": tmdb.cache_stats(),
+        "tmdb_requests": tmdb.request_stats(),
+        "home": home_cache.stats(),
+        "llm": llm_service.cache_stats(),
+    }
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Depends
+from sqlmodel import Session, select
+from pydantic import BaseModel
+from typing import List
+
+from database import get_session, User, WatchlistItem, FavoriteItem
+from auth import get_current_user
+from personalization import for_you
+
+router = APIRouter(tags=["Watchlist & Favorites"])
+
+class MovieToggle(BaseModel):
+    movie_id: int
+
+def _list_ids(model, user: User, session: Session) -> List[int]:
+    statement = select(model.movie_id).where(model.user_id == user.id).order_by(model.added_at.desc())
+    return list(session.exec(statement).all())
+
+def _toggle(model, movie_id: int, user: User, session: Session) -> dict:
+    statement = select(model).where(model.user_id == user.id, model.movie_id == movie_id)
+    existing = session.exec(statement).first()
+
+    if existing:
+        session.delete(existing)
+    else:
+        session.add(model(user_id=user.id, movie_id=movie_id))
+    session.commit()
+
+    # The "For You" row is built from these lists
+    for_you.invalidate(user.id)
+    return {"movie_id": movie_id, "saved": existing is None}
+
+@router.get("/watchlist", response_model=List[int])
+def get_watchlist(user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+    return _list_ids(WatchlistItem, user, session)
+
+@router.post("/watchlist/toggle")
+def toggle_watchlist(data: MovieToggle, user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+    return _toggle(WatchlistItem, data.movie_id, user, session)
+
+@router.get("/favorites", response_model=List[int])
+def get_favorites(user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+    return _list_ids(FavoriteItem, user, session)
+
+@router.post("/favorites/toggle")
+def toggle_favorites(data: MovieToggle, user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+    return _toggle(FavoriteItem, data.movie_id, user, session)
@@ -1,54 +1,71 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlmodel import Session
 from typing import List, Optional
 from pydantic import BaseModel
 import asyncio
+import httpx
 
+from config import settings
 from recommender import recommender
 from tmdb import tmdb
 from llm_service import llm_service
 from auth import get_current_user
-from database import User
+from database import User, get_session
+from personalization import for_you
+from home_cache import home_cache, etag_matches
+from title_index import normalize_title
 
 router = APIRouter(tags=["Movies & Recommendations"])
 
+# Upper bound on recommendations per request, each one is hydrated from TMDB
+MAX_RECOMMENDATIONS = 20
+
+# Upper bound on seed movies per batch request
+MAX_BATCH_SEEDS = 50
+
+# Title lookups in flight at once when hydrating LLM recommendations
+AI_HYDRATION_CONCURRENCY = 8
+
+# Results per /search request (TMDB's page size)
+SEARCH_LIMIT = 20
+
 class RecommendationRequest(BaseModel):
     movie_name: str
+    k: int = 5
+
+class BatchRecommendationRequest(BaseModel):
+    # Seeds can be given by TMDB ID, by title, or both
+    movie_ids: List[int] = []
+    movie_names: List[str] = []
+    k: int = 5
+    blend: bool = False
 
 @router.get("/home")
-async def get_home_data(current_user: User = Depends(get_current_user)):
+async def get_home_data(request: Request, current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
     """Aggregates data for the home page sections with language-based filtering."""
     try:
         # Get user's country for language-based filtering
         country_name = current_user.country if current_user and current_user.country else None
         region = tmdb.get_region_code(country_name) if country_name else None
         
-        # Run these in parallel for speed - pass country_name for language filtering
-        trending, popular, top_rated, upcoming, action, comedy = await asyncio.gather(
-            tmdb.get_trending(region=region, country_name=country_name),
-            tmdb.get_popular(region=region, country_name=country_name),
-            tmdb.get_top_rated(region=region, country_name=country_name),
-            tmdb.get_upcoming(region=region, country_name=country_name),
-            tmdb.get_by_genre(28, region=region, country_name=country_name), # Action
-            tmdb.get_by_genre(35, region=region, country_name=country_name),  # Comedy
+        # Shared sections come pre-serialized per region (see home_cache.py), the
+        # prewarmer keeps the TMDB lists behind them fresh (see prewarm.py)
+        for_you_row, shared = await asyncio.gather(
+            for_you.get_row(current_user.id, session),  # cached per user
+            home_cache.get_sections(region, country_name),
             return_exceptions=True
         )
-        
-        def safe_list(data):
-            return data if isinstance(data, list) else []
-        
-        region_name = country_name if country_name else "Global"
-        
-        return {
-            "region": region_name,
-            "sections": [
-                {"title": f"Trending in {region_name}", "data": safe_list(trending)},
-                {"title": f"Popular in {region_name}", "data": safe_list(popular)},
-                {"title": "Top Rated", "data": safe_list(top_rated)},
-                {"title": "Upcoming Releases", "data": safe_list(upcoming)},
-                {"title": "Action Thrillers", "data": safe_list(action)},
-                {"title": "Comedy Hits", "data": safe_list(comedy)},
-            ]
-        }
+        if isinstance(shared, Exception):
+            raise shared
+        # Personalized row only when there is something to show
+        if isinstance(for_you_row, Exception):
+            for_you_row = None
+
+        body, etag = home_cache.render(country_name or "Global", *shared, for_you_row)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
     except Exception as e:
         print(f"Error fetching home data: {e}")
         import traceback
@@ -72,38 +89,83 @@ async def smart_search(query: str):
     """
     intent = await llm_service.parse_intent(query)
     
-    # If it's a genre/mood query, use discover
-    if intent["type"] == "recommendation" and intent["genre"]:
-        results = await tmdb.get_by_genre(intent["genre"])
-        # Filter by year if present
-        if intent["year"]:
-            results = [m for m in results if m.get("release_date", "").startswith(str(intent["year"]))]
+    # A year or decade narrows the discover query itself, not just its first page
+    years = None
+    year = str(intent["year"] or "")[:4]  # LLM answers may say "1999" or 1999
+    if year.isdigit():
+        years = (int(year), int(year))
+    elif intent.get("decade"):
+        years = (intent["decade"], intent["decade"] + 9)
+
+    # If it's a genre/mood and/or era query ("80s movies"), use discover
+    if intent["type"] == "recommendation" and (intent["genre"] or years):
+        results = await tmdb.get_by_genre(intent["genre"], years=years)
         return {"intent": intent, "results": results}
         
     # Default to standard search but with cleaned keywords
-    results = await tmdb.search_movie(intent["keywords"] or query)
+    results = await search_local_first(intent["keywords"] or query)
     return {"intent": intent, "results": results}
 
+async def search_local_first(query: str, language: Optional[str] = None, genre: Optional[int] = None) -> List[dict]:
+    """
+    Catalog matches from the local index first; TMDB's search is only called when
+    fewer than SEARCH_LOCAL_MIN_RESULTS are found, and its results fill in after them.
+    """
+    ids = recommender.search(query, limit=SEARCH_LIMIT, language=language, genre=genre)
+    results = await tmdb.get_movie_cards(ids)
+    if len(results) >= settings.SEARCH_LOCAL_MIN_RESULTS:
+        return results
+
+    try:
+        remote = await tmdb.search_movie(query)
+    except (httpx.HTTPError, asyncio.TimeoutError) as e:
+        # The local hits are still an answer; search stays up without TMDB
+        print(f"⚠️ TMDB search failed for {query!r}: {e!r}")
+        return results[:SEARCH_LIMIT]
+
+    seen = {movie["id"] for movie in results}
+    for movie in remote:
+        if movie["id"] in seen:
+            continue
+        if language and movie.get("original_language") != language:
+            continue
+        if genre is not None and genre not in movie.get("genre_ids", []):
+            continue
+        results.append(movie)
+    return results[:SEARCH_LIMIT]
+
 @router.get("/search")
-async def search_movies(query: str):
-    return await tmdb.search_movie(query)
+async def search_movies(query: str, language: Optional[str] = None, genre: Optional[int] = None):
+    return await search_local_first(query, language=language, genre=genre)
 
 @router.get("/movie/{movie_id}")
 async def get_movie_details(movie_id: int):
     # This now returns full enriched data (providers, cast, videos)
+    if recommender.has_movie(movie_id):
+        # Catalog movie: recommendations don't depend on the details, fetch both at once
+        ml_rec_ids = recommender.get_recommendations_by_id(movie_id)
+        details, recommendations = await asyncio.gather(
+            tmdb.get_movie_details(movie_id),
+            tmdb.get_movie_cards(ml_rec_ids[:5])  # Cards only, full details are for the opened movie
+        )
+        if not details:
+            raise HTTPException(status_code=404, detail="Movie not found")
+        return {
+            "details": details,
+            "recommendations": recommendations
+        }
+
     details = await tmdb.get_movie_details(movie_id)
     if not details:
         raise HTTPException(status_code=404, detail="Movie not found")
     
-    # Get recommendations based on this movie's title using our ML engine
+    # Not in our catalog: fall back to the closest title match in the ML engine
     ml_rec_ids = recommender.get_recommendations(details['title'])
     
     recommendations = []
     if ml_rec_ids:
-        # Fetch details for recommended IDs from TMDB
-        tasks = [tmdb.get_movie_details(mid) for mid in ml_rec_ids[:5]]
-        results = await asyncio.gather(*tasks)
-        recommendations = [r for r in results if r]
+        # Card data for recommended IDs from TMDB
+        recommendations = await tmdb.get_movie_cards(ml_rec_ids[:5])
     
     return {
         "details": details,
@@ -112,14 +174,52 @@ async def get_movie_details(movie_id: int):
 
 @router.post("/recommend")
 async def get_recommendations_custom(request: RecommendationRequest):
-    ml_rec_ids = recommender.get_recommendations(request.movie_name)
+    k = max(1, min(request.k, MAX_RECOMMENDATIONS))
+    ml_rec_ids = recommender.get_recommendations(request.movie_name, k=k)
     
     if not ml_rec_ids:
         return []
         
-    tasks = [tmdb.get_movie_details(mid) for mid in ml_rec_ids[:5]]
-    results = await asyncio.gather(*tasks)
-    return [r for r in results if r]
+    return await tmdb.get_movie_cards(ml_rec_ids)
+
+@router.post("/recommend/batch")
+async def get_recommendations_batch(request: BatchRecommendationRequest):
+    """
+    Recommendations for many seed movies in one call. Optionally adds a blended
+    "because you liked X, Y, Z" row across all seeds.
+    """
+    k = max(1, min(request.k, MAX_RECOMMENDATIONS))
+    seed_ids = list(request.movie_ids)
+    for name in request.movie_names:
+        row = recommender.find_row(name)
+        if row is not None:
+            seed_ids.append(int(recommender.movie_ids[row]))
+    seed_ids = seed_ids[:MAX_BATCH_SEEDS]
+
+    batch = recommender.get_recommendations_batch(seed_ids, k=k, blend=request.blend)
+
+    # Hydrate every distinct recommended ID once, however many seeds share it
+    wanted = [mid for ids in batch["results"].values() for mid in ids]
+    if batch["blend"]:
+        wanted.extend(batch["blend"]["ids"])
+    cards = {card["id"]: card for card in await tmdb.get_movie_cards(wanted)}
+
+    def hydrate(ids):
+        return [cards[mid] for mid in ids if mid in cards]
+
+    response = {
+        "results": [
+            {"movie_id": seed, "title": recommender.get_title(seed), "recommendations": hydrate(ids)}
+            for seed, ids in batch["results"].items()
+        ],
+        "blend": None
+    }
+    if batch["blend"]:
+        response["blend"] = {
+            "because_you_liked": [recommender.get_title(seed) for seed in batch["blend"]["seeds"]],
+            "recommendations": hydrate(batch["blend"]["ids"])
+        }
+    return response
 
 @router.post("/recommend/ai")
 async def get_ai_recommendations(request: RecommendationRequest, current_user: User = Depends(get_current_user)):
@@ -132,17 +232,14 @@ async def get_ai_recommendations(request: RecommendationRequest, current_user: U
     # 1. Get raw recommendations from LLM (Dict[Country, List[MovieTitle]])
     raw_recs = await llm_service.get_similar_movies(request.movie_name, user_country=current_user.country)
     
-    structured_results = []
+    # 2. Hydrate every distinct title with real TMDB data in one parallel round
+    titles = [title for movies in raw_recs.values() for title in movies]
+    cards = await tmdb.get_cards_by_title(titles, concurrency=AI_HYDRATION_CONCURRENCY)
     
-    # 2. Hydrate with real TMDB data
+    structured_results = []
     for country, movies in raw_recs.items():
-        country_movies = []
-        for movie_title in movies:
-            # Search for the movie to get details (poster, id, etc.)
-            search_results = await tmdb.search_movie(movie_title)
-            if search_results:
-                # Take the first match
-                country_movies.append(search_results[0])
+        keys = dict.fromkeys(normalize_title(title) for title in movies)
+        country_movies = [cards[key] for key in keys if cards.get(key)]
         
         if country_movies:
             structured_results.append({
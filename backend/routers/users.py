@@ -5,6 +5,7 @@ from typing import Optional, List
 
 from database import get_session, User, UserPreference
 from auth import get_current_user
+from personalization import for_you
 
 router = APIRouter(tags=["User Preferences"])
 
@@ -58,6 +59,8 @@ def update_preferences(prefs_data: UserPreferenceUpdate, user: User = Depends(ge
     session.add(prefs)
     session.commit()
     session.refresh(prefs)
+    # Preferred genres feed the "For You" row
+    for_you.invalidate(user.id)
     
     return UserPreferenceRead(
         country=prefs.country,
@@ -0,0 +1,192 @@
+"""
+Full-text search over the recommender catalog.
+
+build_search_index turns titles and overviews into an inverted index stored as
+plain arrays in the model artifact: for every term, the rows containing it with
+their precomputed BM25 weight (title words count TITLE_WEIGHT times). A query
+is then a handful of posting-list additions into one score vector.
+
+SearchIndex is the loaded side. The last query word also matches as a title
+word prefix ("incep" -> "inception"), and a word the index does not know is
+matched against title words one edit away ("incepton"), both at a discount.
+Results can be filtered by original language and genre.
+"""
+import bisect
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from neighbors import top_k_indices
+from title_index import normalize_title
+
+# BM25 parameters (the usual defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+# A title word counts as this many overview words
+TITLE_WEIGHT = 3
+# Score discounts for words matched by prefix or with a typo, and how many expansions one word may have
+PREFIX_FACTOR = 0.8
+TYPO_FACTOR = 0.6
+MAX_EXPANSIONS = 20
+# Shorter words are never typo-corrected ("cat" is one edit away from too many words)
+MIN_TYPO_LENGTH = 4
+
+STOP_WORDS = {
+    "a", "an", "the", "and", "or", "of", "in", "on", "to", "for", "with", "by", "from", "at", "as",
+    "is", "are", "was", "be", "his", "her", "their", "its", "it", "he", "she", "they", "who", "that",
+    "this", "into", "when", "after", "but", "has", "have", "not",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [word for word in normalize_title(text or "").split() if word not in STOP_WORDS]
+
+
+def build_search_index(titles: Iterable[str], overviews: Iterable[str], languages: Iterable[str],
+                       genres: Iterable[Iterable[int]]) -> Dict[str, np.ndarray]:
+    """The search_* artifact arrays for the catalog rows, in row order."""
+    term_freqs = []  # row -> {term: weighted tf}
+    title_terms = set()
+    for title, overview in zip(titles, overviews):
+        freqs = {}
+        for word in tokenize(title):
+            freqs[word] = freqs.get(word, 0) + TITLE_WEIGHT
+            title_terms.add(word)
+        for word in tokenize(overview):
+            freqs[word] = freqs.get(word, 0) + 1
+        term_freqs.append(freqs)
+
+    terms = sorted({term for freqs in term_freqs for term in freqs})
+    col = {term: i for i, term in enumerate(terms)}
+    lengths = np.array([sum(freqs.values()) for freqs in term_freqs], dtype=np.float64)
+    avg_length = lengths.mean() if len(lengths) and lengths.mean() > 0 else 1.0
+
+    postings = [[] for _ in terms]
+    for row, freqs in enumerate(term_freqs):
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[row] / avg_length)
+        for term, tf in freqs.items():
+            postings[col[term]].append((row, tf * (BM25_K1 + 1) / (tf + norm)))
+
+    num_rows = len(term_freqs)
+    indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+    rows, weights = [], []
+    for i, posting in enumerate(postings):
+        # Rare terms weigh more
+        idf = np.log(1 + (num_rows - len(posting) + 0.5) / (len(posting) + 0.5))
+        rows.extend(row for row, _ in posting)
+        weights.extend(idf * weight for _, weight in posting)
+        indptr[i + 1] = len(rows)
+
+    genre_lists = [list(g) for g in genres]
+    genre_indptr = np.zeros(len(genre_lists) + 1, dtype=np.int64)
+    genre_indptr[1:] = np.cumsum([len(g) for g in genre_lists])
+    return {
+        "search_terms": np.asarray(terms, dtype=str),
+        "search_in_title": np.array([term in title_terms for term in terms], dtype=bool),
+        "search_indptr": indptr,
+        "search_rows": np.asarray(rows, dtype=np.int32),
+        "search_weights": np.asarray(weights, dtype=np.float32),
+        "search_languages": np.asarray([lang or "" for lang in languages], dtype=str),
+        "search_genre_indptr": genre_indptr,
+        "search_genre_ids": np.asarray([gid for g in genre_lists for gid in g], dtype=np.int32),
+    }
+
+
+def _deletes(word: str) -> set:
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def within_one_edit(a: str, b: str) -> bool:
+    """True if a and b differ by at most one insertion, deletion, substitution or adjacent swap."""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    i = 0
+    while i < min(len(a), len(b)) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1:] == b[i + 1:] or (a[i:i + 2] == b[i:i + 2][::-1] and a[i + 2:] == b[i + 2:])
+    shorter, longer = (a, b) if len(a) < len(b) else (b, a)
+    return shorter[i:] == longer[i + 1:]
+
+
+class SearchIndex:
+    def __init__(self, arrays: Dict[str, np.ndarray], titles: Iterable[str]):
+        self.indptr = arrays["search_indptr"]
+        self.rows = arrays["search_rows"]
+        self.weights = arrays["search_weights"]
+        self.languages = arrays["search_languages"]
+        self.num_rows = len(self.languages)
+        self.terms = arrays["search_terms"]
+        self.term_to_col = {str(term): col for col, term in enumerate(self.terms)}
+
+        # Title words only: sorted for prefix lookups, and by their one-letter deletions for typos
+        title_cols = np.flatnonzero(arrays["search_in_title"])
+        self._title_terms = sorted((self._term(c), int(c)) for c in title_cols)
+        self._title_words = [term for term, _ in self._title_terms]
+        self._typo_cols: Dict[str, List[int]] = {}
+        for term, c in self._title_terms:
+            if len(term) >= MIN_TYPO_LENGTH:
+                for variant in _deletes(term) | {term}:
+                    self._typo_cols.setdefault(variant, []).append(c)
+
+        self._genre_rows: Dict[int, np.ndarray] = {}
+        genre_indptr, genre_ids = arrays["search_genre_indptr"], arrays["search_genre_ids"]
+        row_of_entry = np.repeat(np.arange(self.num_rows), np.diff(genre_indptr))
+        for gid in np.unique(genre_ids):
+            self._genre_rows[int(gid)] = row_of_entry[genre_ids == gid]
+
+        # Exact (normalized) titles always rank first
+        self._exact_rows: Dict[str, List[int]] = {}
+        for row, title in enumerate(titles):
+            self._exact_rows.setdefault(normalize_title(title), []).append(row)
+        self._exact_rows.pop("", None)
+
+    def _term(self, col: int) -> str:
+        return str(self.terms[col])
+
+    def _expand(self, word: str, prefix: bool) -> List[Tuple[int, float]]:
+        """(term column, score factor) pairs a query word matches."""
+        matches = []
+        col = self.term_to_col.get(word)
+        if col is not None:
+            matches.append((col, 1.0))
+        if prefix:
+            start = bisect.bisect_left(self._title_words, word)
+            for term, c in self._title_terms[start:start + MAX_EXPANSIONS]:
+                if not term.startswith(word):
+                    break
+                if c != col:
+                    matches.append((c, PREFIX_FACTOR))
+        if not matches and len(word) >= MIN_TYPO_LENGTH:
+            candidates = set()
+            for variant in _deletes(word) | {word}:
+                candidates.update(self._typo_cols.get(variant, ()))
+            # Shared deletions also pair words two edits apart ("rainy", "train"); keep only one-edit ones
+            typos = [c for c in sorted(candidates) if within_one_edit(word, self._term(c))]
+            matches.extend((c, TYPO_FACTOR) for c in typos[:MAX_EXPANSIONS])
+        return matches
+
+    def search(self, query: str, limit: int = 20, language: Optional[str] = None,
+               genre: Optional[int] = None) -> List[int]:
+        """Best matching rows, best first, optionally only one original language and/or genre."""
+        words = tokenize(query)
+        scores = np.zeros(self.num_rows, dtype=np.float32)
+        for i, word in enumerate(words):
+            # The last word may still be being typed
+            for col, factor in self._expand(word, prefix=i == len(words) - 1):
+                start, end = self.indptr[col], self.indptr[col + 1]
+                scores[self.rows[start:end]] += factor * self.weights[start:end]
+
+        exact = self._exact_rows.get(normalize_title(query))
+        if exact:
+            scores[exact] += scores.max() + 1.0
+
+        scores[scores <= 0] = -np.inf
+        if language:
+            scores[self.languages != language] = -np.inf
+        if genre is not None:
+            allowed = np.full(self.num_rows, -np.inf, dtype=np.float32)
+            rows = self._genre_rows.get(genre, ())
+            allowed[rows] = scores[rows]
+            scores = allowed
+        return top_k_indices(scores, limit).tolist()
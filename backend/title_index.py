@@ -0,0 +1,108 @@
+"""
+In-memory title lookup for the recommender catalog.
+
+Built once at load time so a request never scans the catalog:
+- exact match: dict of normalized title -> row
+- prefix match: sorted titles + bisect
+- partial match: trigram posting lists, verified with a substring check
+"""
+import bisect
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+NGRAM = 3
+
+
+def normalize_title(text: str) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace ("Spider-Man" -> "spider man")."""
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii")
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+def _ngrams(text: str) -> set:
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+class TitleIndex:
+    def __init__(self, titles: Iterable[str]):
+        self.titles: List[str] = [normalize_title(t) for t in titles]
+
+        # First row wins for duplicate titles, matching the old "first match" behaviour
+        self.exact_rows: Dict[str, int] = {}
+        for row, title in enumerate(self.titles):
+            if title:
+                self.exact_rows.setdefault(title, row)
+
+        self._sorted = sorted((title, row) for row, title in enumerate(self.titles) if title)
+        self._sorted_titles = [title for title, _ in self._sorted]
+
+        postings: Dict[str, List[int]] = {}
+        for row, title in enumerate(self.titles):
+            for gram in _ngrams(title):
+                postings.setdefault(gram, []).append(row)
+        # Rows are appended in order, so every posting list is already sorted
+        self._postings = {gram: np.array(rows, dtype=np.int32) for gram, rows in postings.items()}
+
+    def __len__(self):
+        return len(self.titles)
+
+    def exact(self, text: str) -> Optional[int]:
+        return self.exact_rows.get(normalize_title(text))
+
+    def prefix(self, text: str, limit: Optional[int] = None) -> List[int]:
+        """Rows whose title starts with text, in catalog order."""
+        query = normalize_title(text)
+        if not query:
+            return []
+        start = bisect.bisect_left(self._sorted_titles, query)
+        rows = []
+        for title, row in self._sorted[start:]:
+            if not title.startswith(query):
+                break
+            rows.append(row)
+        rows.sort()
+        return rows[:limit] if limit else rows
+
+    def contains(self, text: str, limit: Optional[int] = None) -> List[int]:
+        """Rows whose title contains text, in catalog order."""
+        query = normalize_title(text)
+        if not query:
+            return []
+
+        grams = _ngrams(query)
+        if grams:
+            lists = sorted((self._postings.get(g) for g in grams), key=lambda p: 0 if p is None else len(p))
+            if lists[0] is None:
+                return []
+            candidates = lists[0]
+            for posting in lists[1:]:
+                candidates = np.intersect1d(candidates, posting, assume_unique=True)
+                if len(candidates) == 0:
+                    return []
+        else:
+            # Queries shorter than one n-gram are rare; a scan is fine for them
+            candidates = range(len(self.titles))
+
+        rows = []
+        for row in candidates:
+            # Trigrams can match out of order, confirm the actual substring
+            if query in self.titles[row]:
+                rows.append(int(row))
+                if limit and len(rows) >= limit:
+                    break
+        return rows
+
+    def lookup(self, text: str) -> Optional[int]:
+        """Best single row for a user-typed title: exact, then prefix, then partial match."""
+        row = self.exact(text)
+        if row is not None:
+            return row
+        for match in (self.prefix, self.contains):
+            rows = match(text, limit=1)
+            if rows:
+                return rows[0]
+        return None
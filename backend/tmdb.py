@@ -1,9 +1,27 @@
 import httpx
 import asyncio
+import contextvars
+import re
 import time
-from typing import List, Dict, Any, Optional
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, List, Dict, Any, Optional, Tuple
+from cache import CacheEntry, LRUCache, create_l2_cache
+from catalog import LocalCatalog
+from title_index import normalize_title
+from ratelimit import TokenBucket, backoff_delay, parse_retry_after
+
+# HTTP/2 needs the optional h2 package (pip install "httpx[http2]")
+try:
+    import h2  # noqa: F401
+    H2_AVAILABLE = True
+except ImportError:
+    H2_AVAILABLE = False
 from config import settings
 
+# Set by collect_keys(): the TMDB cache keys read by the current task and the tasks it starts
+_read_keys: contextvars.ContextVar = contextvars.ContextVar("tmdb_read_keys", default=None)
+
 class TMDBClient:
     # Country name to ISO 3166-1 code mapping for region
     COUNTRY_TO_REGION = {
@@ -41,16 +59,65 @@ class TMDBClient:
         "China": ["zh"],
     }
     
+    # Cache TTL (seconds) per endpoint pattern, first match wins
+    CACHE_TTLS = [
+        (re.compile(r"^/trending/"), 10 * 60),                         # Changes through the day
+        (re.compile(r"^/movie/(popular|top_rated|upcoming)$"), 30 * 60),
+        (re.compile(r"^/discover/"), 30 * 60),
+        (re.compile(r"^/movie/\d+/watch/providers$"), 6 * 3600),
+        (re.compile(r"^/movie/\d+(/credits|/videos)?$"), 24 * 3600),   # Details rarely change
+        (re.compile(r"^/person/\d+/movie_credits$"), 24 * 3600),
+        (re.compile(r"^/collection/\d+$"), 7 * 24 * 3600),
+        (re.compile(r"^/search/movie$"), 10 * 60),
+    ]
+    DEFAULT_CACHE_TTL = 300
+
+    # Timeouts per endpoint pattern, first match wins: nothing may hold a /home request for 30 s
+    REQUEST_TIMEOUTS = [
+        (re.compile(r"^/(trending/|discover/|movie/(popular|top_rated|upcoming)$)"), httpx.Timeout(5.0, connect=2.0)),
+        (re.compile(r"^/search/"), httpx.Timeout(5.0, connect=2.0)),
+        (re.compile(r"^/movie/\d+"), httpx.Timeout(8.0, connect=2.0)),
+    ]
+    DEFAULT_REQUEST_TIMEOUT = httpx.Timeout(10.0, connect=3.0)
+    # Latency-critical list endpoints that may get a hedged (duplicate) request
+    HEDGED_ENDPOINTS = re.compile(r"^/(trending/|discover/movie$|movie/(popular|top_rated|upcoming)$)")
+
     def __init__(self):
+        http2 = settings.TMDB_HTTP2 and H2_AVAILABLE
+        if settings.TMDB_HTTP2 and not H2_AVAILABLE:
+            print("⚠️ Warning: TMDB_HTTP2 is set but h2 is not installed, using HTTP/1.1.")
         self.client = httpx.AsyncClient(
             base_url=settings.TMDB_BASE_URL,
             params={"api_key": settings.TMDB_API_KEY, "language": "en-US"},
-            timeout=30.0,
+            timeout=self.DEFAULT_REQUEST_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.TMDB_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.TMDB_MAX_KEEPALIVE,
+                keepalive_expiry=settings.TMDB_KEEPALIVE_EXPIRY,
+            ),
+            http2=http2,  # One multiplexed connection instead of a pool of them
             follow_redirects=True
         )
-        # Simple in-memory cache: {url_key: (timestamp, data)}
-        self._cache = {}
-        self._cache_ttl = 300  # 5 minutes cache
+        # Bounded LRU so distinct /movie/{id} keys cannot grow memory without limit
+        self._cache = LRUCache(max_entries=settings.TMDB_CACHE_MAX_ENTRIES, max_bytes=settings.TMDB_CACHE_MAX_BYTES)
+        # Every upstream call passes the global concurrency cap and the token bucket (see _request)
+        self._semaphore = asyncio.Semaphore(settings.TMDB_MAX_CONCURRENCY)
+        self._bucket = TokenBucket(settings.TMDB_RATE_LIMIT, settings.TMDB_RATE_BURST)
+        self._queued = 0
+        self._request_counts = {"requests": 0, "throttled": 0, "retried": 0, "rate_limited": 0, "failed": 0,
+                                "hedged": 0, "hedge_wins": 0}
+        # Card data for catalog movies, checked before any TMDB call
+        self.catalog = LocalCatalog(settings.CATALOG_DB_PATH)
+        # normalized title -> card from earlier TMDB searches ({} = no match)
+        self._title_cards = LRUCache(max_entries=20000)
+        # Shared L2 behind the per-worker LRU (None when disabled)
+        self._l2 = create_l2_cache(settings.TMDB_L2_CACHE, settings.TMDB_L2_CACHE_PATH)
+        self._l2_hits = 0
+        # Called with (endpoint, cache key) whenever a cached response is replaced by different data
+        self._refresh_listeners: List[Callable[[str, str], None]] = []
+        # Cache key -> the single upstream fetch concurrent misses on that key await
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._coalesced = 0
     
     def get_region_code(self, country_name: str) -> Optional[str]:
         """Convert country name to ISO region code for TMDB API."""
@@ -62,28 +129,237 @@ class TMDBClient:
 
     async def close(self):
         await self.client.aclose()
+        await self.catalog.close()
+        if self._l2 is not None:
+            await self._l2.close()
+
+    def add_refresh_listener(self, callback: Callable[[str, str], None]) -> None:
+        """Registers callback(endpoint, key) for derived caches that must drop data built from old responses."""
+        self._refresh_listeners.append(callback)
+
+    @contextmanager
+    def collect_keys(self):
+        """
+        Yields a set that collects the cache keys read inside the block (including by tasks it
+        starts), so a derived cache knows which refreshes concern it.
+        """
+        keys = set()
+        token = _read_keys.set(keys)
+        try:
+            yield keys
+        finally:
+            _read_keys.reset(token)
+
+    def request_stats(self) -> Dict[str, Any]:
+        """Upstream traffic: queued = waiting for a concurrency slot now, throttled = had to wait for
+        the rate limit, retried = attempts repeated after 429/5xx/transport errors."""
+        return {**self._request_counts, "queued": self._queued}
+
+    async def _request(self, endpoint: str, params: Optional[dict] = None) -> httpx.Response:
+        """
+        Single entry point for TMDB calls. Caps concurrency and request rate, and retries
+        429/5xx and transport errors with jittered exponential backoff, honoring Retry-After
+        (a 429 pauses every request, not just this one).
+        """
+        attempt = 0
+        while True:
+            self._queued += 1
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self._queued -= 1
+            try:
+                if await self._bucket.acquire() > 0:
+                    self._request_counts["throttled"] += 1
+                self._request_counts["requests"] += 1
+                response = await self._send(endpoint, params)
+            except httpx.TransportError as e:
+                if attempt >= settings.TMDB_MAX_RETRIES:
+                    self._request_counts["failed"] += 1
+                    raise
+                delay = backoff_delay(attempt, settings.TMDB_RETRY_BASE_DELAY, settings.TMDB_MAX_RETRY_DELAY)
+            else:
+                retryable = response.status_code == 429 or response.status_code >= 500
+                if not retryable:
+                    return response
+                if attempt >= settings.TMDB_MAX_RETRIES:
+                    self._request_counts["failed"] += 1
+                    print(f"⚠️ TMDB {endpoint} failed with {response.status_code} after {attempt + 1} attempts")
+                    return response
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                delay = min(retry_after, settings.TMDB_MAX_RETRY_DELAY) if retry_after is not None else \
+                    backoff_delay(attempt, settings.TMDB_RETRY_BASE_DELAY, settings.TMDB_MAX_RETRY_DELAY)
+                if response.status_code == 429:
+                    self._request_counts["rate_limited"] += 1
+                    self._bucket.pause(delay)
+            finally:
+                self._semaphore.release()
+            attempt += 1
+            self._request_counts["retried"] += 1
+            await asyncio.sleep(delay)
+
+    def request_timeout(self, endpoint: str) -> httpx.Timeout:
+        for pattern, timeout in self.REQUEST_TIMEOUTS:
+            if pattern.match(endpoint):
+                return timeout
+        return self.DEFAULT_REQUEST_TIMEOUT
+
+    async def _send(self, endpoint: str, params: Optional[dict]) -> httpx.Response:
+        """
+        One attempt. For HEDGED_ENDPOINTS, a second identical request is sent if the first
+        is still pending after TMDB_HEDGE_DELAY (and the rate limit has a token to spare);
+        whichever completes first wins and the other is cancelled.
+        """
+        timeout = self.request_timeout(endpoint)
+        first = asyncio.ensure_future(self.client.get(endpoint, params=params, timeout=timeout))
+        if settings.TMDB_HEDGE_DELAY <= 0 or not self.HEDGED_ENDPOINTS.match(endpoint):
+            return await first
+
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=settings.TMDB_HEDGE_DELAY)
+            if done or not self._bucket.try_acquire():
+                return await first
+            self._request_counts["hedged"] += 1
+            tasks.add(asyncio.ensure_future(self.client.get(endpoint, params=params, timeout=timeout)))
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self._request_counts["hedge_wins"] += 1
+                        return task.result()
+            # Both attempts failed: surface the original one's error
+            return first.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def cache_ttl(self, endpoint: str) -> int:
+        for pattern, ttl in self.CACHE_TTLS:
+            if pattern.match(endpoint):
+                return ttl
+        return self.DEFAULT_CACHE_TTL
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return {
+            **self._cache.stats(),
+            "inflight": len(self._inflight),
+            "coalesced": self._coalesced,
+            "l2": self._l2.name if self._l2 is not None else None,
+            "l2_hits": self._l2_hits,
+        }
 
-    async def _get_cached(self, endpoint: str, params: dict = None) -> Any:
-        """Helper to fetch with caching."""
-        # Create a unique key for the request
+    @staticmethod
+    def cache_key(endpoint: str, params: Optional[dict] = None) -> str:
+        """Unique key for a request: endpoint plus its params in sorted order."""
         param_str = sorted(params.items()) if params else ""
-        key = f"{endpoint}:{param_str}"
-        
-        now = time.time()
-        if key in self._cache:
-            timestamp, data = self._cache[key]
-            if now - timestamp < self._cache_ttl:
-                return data
+        return f"{endpoint}:{param_str}"
+
+    async def refresh_cached(self, endpoint: str, params: Optional[dict] = None, min_fresh: float = 0) -> Any:
+        """
+        Brings one cached response up to date for warmers: unlike refresh=True, an L2 entry
+        that stays fresh for at least min_fresh more seconds (another worker, or this one
+        before a restart, just fetched it) is taken as is instead of calling TMDB again.
+        """
+        key = self.cache_key(endpoint, params)
+        return await asyncio.shield(self._start_fetch(key, endpoint, params, use_l2=True, min_fresh=min_fresh))
+
+    async def _get_cached(self, endpoint: str, params: dict = None, refresh: bool = False) -> Any:
+        """Helper to fetch with caching. refresh=True skips both cache tiers and re-fetches from TMDB."""
+        key = self.cache_key(endpoint, params)
+        read_keys = _read_keys.get()
+        if read_keys is not None:
+            read_keys.add(key)
+
+        if refresh:
+            return await asyncio.shield(self._start_fetch(key, endpoint, params, use_l2=False))
+
+        data, fresh = self._cache.get_stale(key)
+        if data is not None:
+            if not fresh:
+                # Stale-while-revalidate: answer now, refresh in the background
+                self._start_fetch(key, endpoint, params)
+            return data
         
-        # Fetch fresh
-        response = await self.client.get(endpoint, params=params)
+        # Shielded, so one caller being cancelled does not cancel the fetch for the others
+        return await asyncio.shield(self._start_fetch(key, endpoint, params))
+
+    def _start_fetch(self, key: str, endpoint: str, params: Optional[dict], use_l2: bool = True,
+                     min_fresh: float = 0) -> asyncio.Task:
+        # Single-flight: concurrent misses (and refreshes) on the same key share one upstream call
+        task = self._inflight.get(key)
+        if task is not None:
+            self._coalesced += 1
+            return task
+        task = asyncio.ensure_future(self._fetch(key, endpoint, params, use_l2, min_fresh))
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._fetch_done(key, t))
+        return task
+
+    async def _fetch(self, key: str, endpoint: str, params: Optional[dict], use_l2: bool = True,
+                     min_fresh: float = 0) -> Any:
+        # Another worker (or this one before a restart) may already have fetched or refreshed it
+        fallback = None
+        if self._l2 is not None and use_l2:
+            entry = await self._l2_get(key)
+            if entry is not None:
+                self._l2_hits += 1
+                self._cache_entry(key, endpoint, entry)
+                if entry.expires_at - time.time() > min_fresh:
+                    return entry.value
+                fallback = entry.value  # Stale (or soon) there too: refresh, but keep it if TMDB fails
+
+        # On failure nothing is written, so a stale entry keeps being served until its max-stale bound
+        try:
+            response = await self._request(endpoint, params=params)
+        except httpx.HTTPError:
+            if fallback is None:
+                raise
+            return fallback
         if response.status_code != 200:
-            return None
+            return fallback
         
         data = response.json()
-        self._cache[key] = (now, data)
+        expires_at = time.time() + self.cache_ttl(endpoint)
+        # Entries are sized by their raw payload, which tracks the parsed size closely enough
+        entry = CacheEntry(data, expires_at, expires_at + settings.TMDB_CACHE_MAX_STALE, len(response.content))
+        self._cache_entry(key, endpoint, entry)
+        if self._l2 is not None:
+            await self._l2_set(key, entry)
         return data
 
+    def _cache_entry(self, key: str, endpoint: str, entry: CacheEntry) -> None:
+        previous = self._cache.peek(key)
+        # A first fill replaces nothing, so nothing derived from this key can be out of date
+        changed = previous is not None and previous != entry.value
+        now = time.time()
+        self._cache.set(key, entry.value, ttl=entry.expires_at - now, size=entry.size,
+                        max_stale=entry.stale_until - entry.expires_at)
+        if changed:
+            for callback in self._refresh_listeners:
+                callback(endpoint, key)
+
+    # L2 failures only cost a cache miss, never the request
+    async def _l2_get(self, key: str) -> Optional[CacheEntry]:
+        try:
+            return await self._l2.get(key)
+        except Exception as e:
+            print(f"⚠️ L2 cache read failed: {e!r}")
+            return None
+
+    async def _l2_set(self, key: str, entry: CacheEntry) -> None:
+        try:
+            await self._l2.set(key, entry)
+        except Exception as e:
+            print(f"⚠️ L2 cache write failed: {e!r}")
+
+    def _fetch_done(self, key: str, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        # Background refreshes have no waiter, so failures are reported here
+        if not task.cancelled() and task.exception() is not None:
+            print(f"⚠️ TMDB fetch failed for {key}: {task.exception()!r}")
+
     # Static genre map for when API only returns IDs
     GENRE_MAP = {
         28: "Action", 12: "Adventure", 16: "Animation", 35: "Comedy", 80: "Crime",
@@ -92,6 +368,9 @@ class TMDBClient:
         10770: "TV Movie", 53: "Thriller", 10752: "War", 37: "Western"
     }
 
+    # Genre rows on /home: Action, Comedy
+    HOME_GENRES = [28, 35]
+
     def _process_movie(self, movie: Dict[str, Any]) -> Dict[str, Any]:
         """Helper to format movie data for frontend"""
         if not movie:
@@ -125,86 +404,82 @@ class TMDBClient:
             "original_language": movie.get("original_language")
         }
 
-    async def get_popular(self, region: Optional[str] = None, country_name: Optional[str] = None) -> List[Dict[str, Any]]:
-        # Use language-based filtering for better regional content
-        if country_name and country_name in self.COUNTRY_TO_LANGUAGES:
-            languages = self.COUNTRY_TO_LANGUAGES[country_name]
-            # Use discover API with language filter
-            params = {
-                "sort_by": "popularity.desc",
-                "with_original_language": "|".join(languages),  # OR condition for multiple languages
-                "page": 1
-            }
-            data = await self._get_cached("/discover/movie", params=params)
-        else:
-            params = {"region": region} if region else {}
-            data = await self._get_cached("/movie/popular", params=params)
-        if not data: return []
-        return [self._process_movie(m) for m in data.get("results", [])]
+    async def get_home_lists(self, region: Optional[str] = None, country_name: Optional[str] = None,
+                             refresh: bool = False) -> List[Any]:
+        """
+        The six /home lists (trending, popular, top rated, upcoming, then one per HOME_GENRES entry)
+        fetched in parallel. Failed lists come back as exceptions, like asyncio.gather(return_exceptions=True).
+        """
+        return await asyncio.gather(
+            self.get_trending(region=region, country_name=country_name, refresh=refresh),
+            self.get_popular(region=region, country_name=country_name, refresh=refresh),
+            self.get_top_rated(region=region, country_name=country_name, refresh=refresh),
+            self.get_upcoming(region=region, country_name=country_name, refresh=refresh),
+            *[self.get_by_genre(genre_id, region=region, country_name=country_name, refresh=refresh)
+              for genre_id in self.HOME_GENRES],
+            return_exceptions=True
+        )
 
-    async def get_top_rated(self, region: Optional[str] = None, country_name: Optional[str] = None) -> List[Dict[str, Any]]:
+    def _list_request(self, kind: str, region: Optional[str] = None, country_name: Optional[str] = None,
+                      genre_id: Optional[int] = None) -> Tuple[str, Optional[dict]]:
+        """(endpoint, params) behind one /home list: "popular", "top_rated", "upcoming", "trending" or "genre"."""
         # Use language-based filtering for better regional content
-        if country_name and country_name in self.COUNTRY_TO_LANGUAGES:
-            languages = self.COUNTRY_TO_LANGUAGES[country_name]
-            params = {
-                "sort_by": "vote_average.desc",
-                "with_original_language": "|".join(languages),
-                "vote_count.gte": 100,  # Minimum votes for quality
-                "page": 1
-            }
-            data = await self._get_cached("/discover/movie", params=params)
-        else:
-            params = {"region": region} if region else {}
-            data = await self._get_cached("/movie/top_rated", params=params)
-        if not data: return []
-        return [self._process_movie(m) for m in data.get("results", [])]
+        languages = self.COUNTRY_TO_LANGUAGES.get(country_name) if country_name else None
+        language_filter = "|".join(languages) if languages else None  # OR condition for multiple languages
+        if kind == "genre":
+            params = {"with_genres": genre_id} if genre_id else {}
+            if language_filter:
+                params["with_original_language"] = language_filter
+            elif region:
+                params["region"] = region
+            return "/discover/movie", params
+        if kind == "trending" and not language_filter:
+            if region:
+                return "/discover/movie", {"sort_by": "popularity.desc", "region": region, "page": 1}
+            return "/trending/movie/week", None
+        if not language_filter:
+            return f"/movie/{kind}", {"region": region} if region else {}
 
-    async def get_upcoming(self, region: Optional[str] = None, country_name: Optional[str] = None) -> List[Dict[str, Any]]:
-        # Use language-based filtering for better regional content
-        if country_name and country_name in self.COUNTRY_TO_LANGUAGES:
-            languages = self.COUNTRY_TO_LANGUAGES[country_name]
-            from datetime import datetime
-            today = datetime.now().strftime("%Y-%m-%d")
-            params = {
-                "sort_by": "popularity.desc",
-                "with_original_language": "|".join(languages),
-                "primary_release_date.gte": today,
-                "page": 1
-            }
-            data = await self._get_cached("/discover/movie", params=params)
-        else:
-            params = {"region": region} if region else {}
-            data = await self._get_cached("/movie/upcoming", params=params)
-        if not data: return []
-        return [self._process_movie(m) for m in data.get("results", [])]
-        
-    async def get_trending(self, region: Optional[str] = None, country_name: Optional[str] = None) -> List[Dict[str, Any]]:
-        # Use language-based filtering for better regional content
-        if country_name and country_name in self.COUNTRY_TO_LANGUAGES:
-            languages = self.COUNTRY_TO_LANGUAGES[country_name]
-            params = {
-                "sort_by": "popularity.desc",
-                "with_original_language": "|".join(languages),
-                "page": 1
-            }
-            data = await self._get_cached("/discover/movie", params=params)
-        elif region:
-            params = {"sort_by": "popularity.desc", "region": region, "page": 1}
-            data = await self._get_cached("/discover/movie", params=params)
-        else:
-            data = await self._get_cached("/trending/movie/week")
+        params = {"sort_by": "popularity.desc", "with_original_language": language_filter, "page": 1}
+        if kind == "top_rated":
+            params["sort_by"] = "vote_average.desc"
+            params["vote_count.gte"] = 100  # Minimum votes for quality
+        elif kind == "upcoming":
+            params["primary_release_date.gte"] = datetime.now().strftime("%Y-%m-%d")
+        return "/discover/movie", params
+
+    def home_list_requests(self, region: Optional[str] = None, country_name: Optional[str] = None) -> List[Tuple[str, Optional[dict]]]:
+        """(endpoint, params) of the lists get_home_lists returns, in the same order."""
+        return [self._list_request(kind, region, country_name) for kind in ("trending", "popular", "top_rated", "upcoming")] + \
+               [self._list_request("genre", region, country_name, genre_id) for genre_id in self.HOME_GENRES]
+
+    async def _get_list(self, kind: str, region: Optional[str], country_name: Optional[str], refresh: bool) -> List[Dict[str, Any]]:
+        endpoint, params = self._list_request(kind, region, country_name)
+        data = await self._get_cached(endpoint, params=params, refresh=refresh)
         if not data: return []
         return [self._process_movie(m) for m in data.get("results", [])]
 
-    async def get_by_genre(self, genre_id: int, region: Optional[str] = None, country_name: Optional[str] = None) -> List[Dict[str, Any]]:
-        params = {"with_genres": genre_id}
-        # Use language-based filtering for better regional content
-        if country_name and country_name in self.COUNTRY_TO_LANGUAGES:
-            languages = self.COUNTRY_TO_LANGUAGES[country_name]
-            params["with_original_language"] = "|".join(languages)
-        elif region:
-            params["region"] = region
-        data = await self._get_cached("/discover/movie", params=params)
+    async def get_popular(self, region: Optional[str] = None, country_name: Optional[str] = None, refresh: bool = False) -> List[Dict[str, Any]]:
+        return await self._get_list("popular", region, country_name, refresh)
+
+    async def get_top_rated(self, region: Optional[str] = None, country_name: Optional[str] = None, refresh: bool = False) -> List[Dict[str, Any]]:
+        return await self._get_list("top_rated", region, country_name, refresh)
+
+    async def get_upcoming(self, region: Optional[str] = None, country_name: Optional[str] = None, refresh: bool = False) -> List[Dict[str, Any]]:
+        return await self._get_list("upcoming", region, country_name, refresh)
+
+    async def get_trending(self, region: Optional[str] = None, country_name: Optional[str] = None, refresh: bool = False) -> List[Dict[str, Any]]:
+        return await self._get_list("trending", region, country_name, refresh)
+
+    async def get_by_genre(self, genre_id: Optional[int], region: Optional[str] = None, country_name: Optional[str] = None,
+                           refresh: bool = False, years: Optional[Tuple[int, int]] = None) -> List[Dict[str, Any]]:
+        # No genre_id discovers across all genres, e.g. just a release year range
+        endpoint, params = self._list_request("genre", region, country_name, genre_id)
+        # Inclusive (first, last) release years, filtered by TMDB so every page is in range
+        if years:
+            params["primary_release_date.gte"] = f"{years[0]}-01-01"
+            params["primary_release_date.lte"] = f"{years[1]}-12-31"
+        data = await self._get_cached(endpoint, params=params, refresh=refresh)
         if not data: return []
         return [self._process_movie(m) for m in data.get("results", [])]
 
@@ -243,15 +518,87 @@ class TMDBClient:
         return trailers if trailers else results[:1]
 
     async def search_movie(self, query: str) -> List[Dict[str, Any]]:
-        # Search results shouldn't be cached as aggressively or at all, but for now we skip caching or use short TTL
-        # We'll use the direct client for search to ensure freshness or avoid cache explosion
-        response = await self.client.get("/search/movie", params={"query": query})
-        if response.status_code != 200: return []
-        
-        results = response.json().get("results", [])
+        # Cached briefly under the case- and spacing-insensitive query; /search tries the local index first
+        data = await self._get_cached("/search/movie", params={"query": " ".join(query.lower().split())})
+        if not data:
+            return []
+
+        results = data.get("results", [])
         valid_results = [m for m in results if m.get("poster_path")]
         return [self._process_movie(m) for m in valid_results]
 
+    # Fields a movie card (row tile, recommendation) needs; the rest is for the detail view
+    CARD_FIELDS = ("id", "title", "overview", "release_date", "vote_average", "poster_url",
+                   "backdrop_url", "genres", "genre_ids", "original_language")
+
+    async def get_movie_cards(self, movie_ids: List[int]) -> List[Dict[str, Any]]:
+        """
+        Lightweight cards for a list of movies, in order, duplicates and misses dropped.
+        Catalog movies with a known poster come from the local catalog without any network
+        call; the rest cost one cached details request per distinct id (no credits/providers/
+        videos). Full enrichment is left to get_movie_details for the movie being opened.
+        """
+        unique_ids = list(dict.fromkeys(movie_ids))
+        local = {mid: self.catalog.get(mid) for mid in unique_ids}
+        remote_ids = [mid for mid in unique_ids if not (local[mid] and local[mid]["poster_path"])]
+        results = await asyncio.gather(*[self._get_cached(f"/movie/{mid}") for mid in remote_ids], return_exceptions=True)
+        for mid, data in zip(remote_ids, results):
+            # On a TMDB failure a catalog movie still gets its card, just without images
+            if data and not isinstance(data, Exception):
+                self._remember_images(data)
+                local[mid] = data
+
+        cards = []
+        for mid in unique_ids:
+            if local[mid]:
+                movie = self._process_movie(local[mid])
+                cards.append({field: movie[field] for field in self.CARD_FIELDS})
+        return cards
+
+    # How long a search-resolved title -> card mapping is trusted (misses are retried sooner)
+    TITLE_CARD_TTL = 7 * 24 * 3600
+    TITLE_MISS_TTL = 3600
+
+    async def get_cards_by_title(self, titles: List[str], concurrency: int = 8) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Card per distinct normalized title (None when TMDB has no match), resolved concurrently
+        with at most `concurrency` lookups in flight. A title is matched against the local
+        catalog, then the cards of earlier searches, and only then searched on TMDB, so each
+        title costs at most one upstream round.
+        """
+        originals = {}
+        for title in titles:
+            originals.setdefault(normalize_title(title), title)
+        originals.pop("", None)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def resolve(key: str) -> Optional[Dict[str, Any]]:
+            movie_id = self.catalog.find_id(key)
+            if movie_id is None:
+                card = self._title_cards.get(key)
+                if card is not None:
+                    return card or None
+            async with semaphore:
+                if movie_id is not None:
+                    cards = await self.get_movie_cards([movie_id])
+                    return cards[0] if cards else None
+                results = await self.search_movie(originals[key])
+            if not results:
+                self._title_cards.set(key, {}, ttl=self.TITLE_MISS_TTL)
+                return None
+            card = {field: results[0][field] for field in self.CARD_FIELDS}
+            self._title_cards.set(key, card, ttl=self.TITLE_CARD_TTL)
+            return card
+
+        keys = list(originals)
+        cards = await asyncio.gather(*[resolve(key) for key in keys], return_exceptions=True)
+        return {key: None if isinstance(card, Exception) else card for key, card in zip(keys, cards)}
+
+    def _remember_images(self, data: Dict[str, Any]) -> None:
+        # The catalog CSVs have no image paths, so TMDB's are stored for the next card
+        if data.get("poster_path"):
+            self.catalog.update_images(data.get("id"), data.get("poster_path"), data.get("backdrop_path"))
+
     async def get_movie_details(self, movie_id: int) -> Optional[Dict[str, Any]]:
         # This aggregates multiple cached calls
         details_task = self._get_cached(f"/movie/{movie_id}")
@@ -266,6 +613,7 @@ class TMDBClient:
         if not details_res or isinstance(details_res, Exception):
             return None
             
+        self._remember_images(details_res)
         movie = self._process_movie(details_res)
         
         if not isinstance(credits, Exception): movie["credits"] = credits
@@ -275,7 +623,7 @@ class TMDBClient:
         return movie
 
     async def search_person(self, query: str) -> List[Dict[str, Any]]:
-        response = await self.client.get("/search/person", params={"query": query})
+        response = await self._request("/search/person", params={"query": query})
         if response.status_code != 200:
             return []
         results = response.json().get("results", [])
@@ -419,12 +767,7 @@ class TMDBClient:
         return [self._process_movie(m) for m in data.get("parts", [])] if data else []
 
     async def _get_movies_by_ids(self, movie_ids: list):
-        tasks = []
-        for mid in movie_ids:
-            tasks.append(self.get_movie_details(mid))
-        
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        return [r for r in results if r and not isinstance(r, Exception)]
+        return await self.get_movie_cards(movie_ids)
 
 # Singleton instance
 tmdb = TMDBClient()